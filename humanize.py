@@ -21,6 +21,8 @@ Configuration files are used to add user friendly object names.
 """""
 from __future__ import print_function
 
+import logging
+import multiprocessing
 import os
 import sys
 
@@ -53,6 +55,33 @@ PERFORMANCE_METRICS_BY_NODE = 'performance_metrics_by_node.csv'
 PERFORMANCE_METRICS_BY_DRIVE_BY_NODE = 'performance_metrics_by_drive_by_node.csv'
 PERFORMANCE_METRICS_BY_DRIVE_BY_APPLIANCE = 'performance_metrics_by_drive_by_appliance.csv'
 
+# The humanize classes with the methods and metrics files they update. The humanize classes share no state, every one
+# of them creates its own lookups from the configuration files, so they are processed independently of each other.
+HUMANIZE_TABLES = (
+    (HumanizeFileSystem, (('add_details', PERFORMANCE_METRICS_BY_FILE_SYSTEM),)),
+    (HumanizeVolumes, (('add_details', PERFORMANCE_METRICS_BY_VOLUME),)),
+    (HumanizeCache, (('add_details', PERFORMANCE_METRICS_BY_CACHE_BY_NODE),)),
+    (HumanizeAppliance, (('add_details', PERFORMANCE_METRICS_BY_APPLIANCE),)),
+    (HumanizeNode, (('add_details', PERFORMANCE_METRICS_BY_FEE_NODE),
+                    ('add_fe_fc_node_details', PERFORMANCE_METRICS_BY_FE_FC_NODE),
+                    ('add_metrics_node_details', PERFORMANCE_METRICS_BY_NODE))),
+    (HumanizeEthPort, (('add_details', PERFORMANCE_METRICS_BY_FEE_PORT),)),
+    (HumanizeFcPort, (('add_details', PERFORMANCE_METRICS_BY_FE_FC_PORT),)),
+    (HumanizeHardware, (('add_details', PERFORMANCE_METRICS_BY_DRIVE_BY_NODE),
+                        ('add_metrics_by_drive_by_appliance_details', PERFORMANCE_METRICS_BY_DRIVE_BY_APPLIANCE))),
+)
+
+# The progress and the records written in every metrics file are reported on stdout, the same as the print calls
+# they replace. The handler is set on the module logger rather than in main, so the report also appears when
+# make_human_readable is called directly. The records are not propagated, so a caller that configures the root logger
+# does not get every line twice.
+logger = logging.getLogger(__name__)
+logger_handler = logging.StreamHandler(sys.stdout)
+logger_handler.setFormatter(logging.Formatter('%(message)s'))
+logger.addHandler(logger_handler)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
 
 def make_human_readable(input_directory_name_list=None):
     """
@@ -82,44 +111,58 @@ def make_human_readable(input_directory_name_list=None):
         sys.stderr.write('Error while processing '.format(str(err)))
         sys.exit(-1)
 
-    # Process file system metrics file.
-    file_system = HumanizeFileSystem(input_directory_name_list)
-    file_system.add_details(PERFORMANCE_METRICS_BY_FILE_SYSTEM)
-
-    # Process volume metrics file
-    volume_metrics = HumanizeVolumes(input_directory_name_list)
-    volume_metrics.add_details(PERFORMANCE_METRICS_BY_VOLUME)
+    # The per-file record counts are accumulated and reported once, when all metric files have been processed.
+    records_written_by_file = []
+
+    # Process the file system, volume, cache by node, appliance, node, eth port, fe fc port and drive metrics files.
+    # The humanize classes are independent, so they are processed in parallel by a pool of worker processes.
+    arguments = [(humanize_class, input_directory_name_list, table_methods)
+                 for humanize_class, table_methods in HUMANIZE_TABLES]
+
+    workers = min(len(arguments), multiprocessing.cpu_count())
+    if workers > 1:
+        pool = multiprocessing.Pool(processes=workers)
+        try:
+            for table_records_written in pool.map(humanize_tables, arguments):
+                records_written_by_file.extend(table_records_written)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for argument in arguments:
+            records_written_by_file.extend(humanize_tables(argument))
+
+    # Process 5 second performance metric files. These are converted by a pool of their own.
+    five_sec_metrics = HumanizeFiveSecMetrics(input_directory_name_list)
+    records_written_by_file.extend(five_sec_metrics.convert_metric_files())
 
-    # Process cache by node metrics file.
-    cache_metrics = HumanizeCache(input_directory_name_list)
-    cache_metrics.add_details(PERFORMANCE_METRICS_BY_CACHE_BY_NODE)
+    # The worker processes return their counts instead of logging them, so the report is written by this process.
+    # Files that were skipped or could not be processed have no records written and are left out of the report.
+    for filename, records_written in records_written_by_file:
+        if records_written:
+            logger.info('Records written in %s are %s', filename, records_written)
 
-    # Process appliance metrics file.
-    appliance_metrics = HumanizeAppliance(input_directory_name_list)
-    appliance_metrics.add_details(PERFORMANCE_METRICS_BY_APPLIANCE)
+    logger.info('Processed and wrote %s records to directory "%s"',
+                sum(records_written for _, records_written in records_written_by_file), OUTPUT_DIR)
 
-    # Process node metrics files.
-    node_metrics = HumanizeNode(input_directory_name_list)
-    node_metrics.add_details(PERFORMANCE_METRICS_BY_FEE_NODE)
-    node_metrics.add_fe_fc_node_details(PERFORMANCE_METRICS_BY_FE_FC_NODE)
-    node_metrics.add_metrics_node_details(PERFORMANCE_METRICS_BY_NODE)
 
-    # Process eth port files
-    eth_port_metrics = HumanizeEthPort(input_directory_name_list)
-    eth_port_metrics.add_details(PERFORMANCE_METRICS_BY_FEE_PORT)
+def humanize_tables(arguments):
+    """
+    Create the lookups of a humanize class and update its metrics files. This is a module level function so it can be
+    run by a worker process of a multiprocessing pool.
 
-    # Process fe fc port metrics file.
-    fc_port_metrics = HumanizeFcPort(input_directory_name_list)
-    fc_port_metrics.add_details(PERFORMANCE_METRICS_BY_FE_FC_PORT)
+    Args:
+        arguments (tuple): The humanize class, the input directory list and the (method name, metrics file) pairs to
+            call.
 
-    # Process drive by node metrics file.
-    hardware_metrics = HumanizeHardware(input_directory_name_list)
-    hardware_metrics.add_details(PERFORMANCE_METRICS_BY_DRIVE_BY_NODE)
-    hardware_metrics.add_metrics_by_drive_by_appliance_details(PERFORMANCE_METRICS_BY_DRIVE_BY_APPLIANCE)
+    Returns:
+        A list of (metrics file name, records written) tuples, one for every metrics file.
+    """""
+    humanize_class, input_directory_name_list, table_methods = arguments
+    humanize_metrics = humanize_class(input_directory_name_list)
 
-    # Process 5 second performance metric files.
-    five_sec_metrics = HumanizeFiveSecMetrics(input_directory_name_list)
-    five_sec_metrics.add_details("")
+    return [(table_name, getattr(humanize_metrics, method_name)(table_name))
+            for method_name, table_name in table_methods]
 
 
 def is_processed_metrics_directory_present():
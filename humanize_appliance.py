@@ -86,8 +86,6 @@ class HumanizeAppliance(Humanize):
         # After appending appliance details write to file in output directory keeping same file name.
         appliance_records = self.write_to_file(filename, data_with_appliance_details)
 
-        print('Records written in {} are {}'.format(filename, appliance_records))
-
         return appliance_records
 
     @staticmethod
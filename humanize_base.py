@@ -26,16 +26,29 @@ import io
 import os
 import sys
 from collections import namedtuple, OrderedDict
+from itertools import islice
+
+try:
+    # Python 3 moved intern to the sys module, on Python 2 it is a builtin.
+    from sys import intern
+except ImportError:
+    pass
 
 # Bytes to Kib or MiB converter.
 BYTES_CONVERTER = 1024.0
 
+# Bytes in a MiB, so a conversion to MiB takes a single division.
+BYTES_PER_MIB = BYTES_CONVERTER * BYTES_CONVERTER
+
 # Name of the output directory for humanize.
 OUTPUT_DIR = 'output'
 
 # Helps to determine the current sys version of python being used as script supports multiple python version.
 PY_VERSION_MAJOR = sys.version_info.major
 
+# The namedtuple classes created for the headers of the metrics and configuration files.
+RECORD_TYPE_CACHE = dict()
+
 # File name when volume details are present when system in HCI mode.
 VIRTUAL_VOLUME_FILENAME = 'virtual_volume.csv'
 
@@ -47,6 +60,11 @@ class Humanize(object):
     # Name of the output directory for stitch.py.
     PROCESSED_METRICS_OUTPUT_DIR = 'processed-metrics'
 
+    # The input directories do not change while the metrics are processed. The subdirectories and files found in an
+    # input directory are kept for the lifetime of the process, so the humanize classes run in the same process walk
+    # the directory tree only once. Every worker process of a pool walks it again for itself.
+    directory_walk_cache = dict()
+
     def __init__(self, input_directory):
         pass
 
@@ -87,7 +105,6 @@ class Humanize(object):
         Exception:
             IOError if unable to write to file.
         """""
-        records_written = 0
         open_mode, kwargs = self.get_mode_and_newline()
         file_name = get_full_path_for_file(OUTPUT_DIR, table_name)
 
@@ -95,15 +112,60 @@ class Humanize(object):
             with io.open(file_name, open_mode, **kwargs) as csv_file:
                 writer = csv.writer(csv_file, delimiter=',')
 
-                for line in file_data:
-                    records_written += 1
-                    writer.writerow(line)
+                # All records are handed to the writer in one call, the rows are formatted and written without a
+                # Python level loop.
+                writer.writerows(file_data)
 
-            return records_written
+            return len(file_data)
 
         except IOError:
             raise IOError("Additional Information cannot be written in {}".format(file_name))
 
+    def stream_file_data(self, table_name, make_record_augmenter):
+        """
+        Read a processed metrics file row by row, add the additional columns to every record and write it to the output
+        file straight away. Only the record that is being augmented is held in memory.
+
+        Args:
+            table_name (str): Name of the table that needs to be updated.
+            make_record_augmenter: Function that is called once with the header row. It extends the header with the
+                names of the additional columns and returns a function that appends their values to a record.
+
+        Returns:
+             Count of the records written to the file_name.
+
+        Exception:
+            IOError if the metrics file cannot be read or the output file cannot be written.
+        """""
+        records_written = 0
+        open_mode, kwargs = self.get_mode_and_newline()
+        input_filename = get_full_path_for_file(self.PROCESSED_METRICS_OUTPUT_DIR, table_name)
+        file_name = get_full_path_for_file(OUTPUT_DIR, table_name)
+
+        with open(input_filename) as file_reader_handle:
+            file_reader = csv.reader(file_reader_handle)
+            header = next(file_reader, None)
+            if header is None:
+                return records_written
+
+            augment_record = make_record_augmenter(header)
+
+            try:
+                with io.open(file_name, open_mode, **kwargs) as csv_file:
+                    writer = csv.writer(csv_file, delimiter=',')
+                    writer.writerow(header)
+                    records_written += 1
+
+                    for record in file_reader:
+                        augment_record(record)
+                        writer.writerow(record)
+                        records_written += 1
+
+                return records_written
+
+            except IOError:
+                raise IOError("Additional Information cannot be written in {}".format(file_name))
+
     @staticmethod
     def get_mode_and_newline():
         """
@@ -164,8 +226,14 @@ class Humanize(object):
         # This is the total list of CSV files that have been found in the subdirectories.
         csv_files_list = []
 
+        # The directory tree is walked once for all the file names that are searched for.
+        directory_walk = self.directory_walk_cache.get(directory_name)
+        if directory_walk is None:
+            directory_walk = [(subdir, files) for subdir, _, files in os.walk(directory_name)]
+            self.directory_walk_cache[directory_name] = directory_walk
+
         # This loop creates a file path for every single CSV file, including the top level file names.
-        for subdir, _, files in os.walk(directory_name):
+        for subdir, files in directory_walk:
             # Iterate through the subdirectories and get a list of CSV files in each directory.
             csv_files_list.extend([os.path.join(subdir, local_file) for local_file in files
                                    if local_file.lower() == filename and os.path.splitext(local_file)[1].lower() ==
@@ -247,7 +315,7 @@ class Humanize(object):
                     # namedtuple object for further processing
                     # file headers are used to declare namedtuples.
                     # Eg: Row = namedtuple('Row', ['first', 'second', 'third'])
-                    data = namedtuple('FileData', next(reader))
+                    data = get_record_type('FileData', next(reader))
 
                     for row in reader:
                         # Convert list to namedtuple.
@@ -259,8 +327,14 @@ class Humanize(object):
                         file_data = data._make(row)
                         file_dict = file_data._asdict()
 
+                        # The id is kept as the same interned str the csv reader produces for the metrics files, so
+                        # a lookup never misses on the type of the key and equal ids share one string.
+                        object_id = file_dict.get('id')
+                        if object_id is not None:
+                            object_id = intern(str(object_id))
+
                         # Get name from vmw_volume column for virtual_volume.csv file else from name.
-                        id_name_dict[file_dict.get('id')] = file_dict.get('vmw_vvolname') \
+                        id_name_dict[object_id] = file_dict.get('vmw_vvolname') \
                             if VIRTUAL_VOLUME_FILENAME in filename \
                             else file_dict.get('name')
 
@@ -294,7 +368,7 @@ class Humanize(object):
             try:
                 with open(filename) as file_handle:
                     reader = csv.reader(file_handle)
-                    data = namedtuple('FileData', next(reader))
+                    data = get_record_type('FileData', next(reader))
 
                     for row in reader:
                         file_data = data._make(row)
@@ -308,7 +382,7 @@ class Humanize(object):
                         # columns in file.
                         # '__getattribute__' returns the attribute value from the namedtuple object to use
                         # as a value for nested dictionary.
-                        value_lookup[file_data.id] = OrderedDict(
+                        value_lookup[intern(str(file_data.id))] = OrderedDict(
                             list(map(lambda column: (
                                 column,
                                 file_data.__getattribute__(column) if file_data.__getattribute__(column) else 0),
@@ -347,56 +421,64 @@ class Humanize(object):
         # Get index of column used to perform lookup.
         column_index = file_data[0].index(column_name)
 
+        # The lookup method is bound once, and the rows are not copied out of the list to skip the header.
+        get_name = id_name_lookup.get
+
         # Lookup for name from id_name_lookup for all rows excluding the header.
-        for data in file_data[1:]:
+        for data in islice(file_data, 1, None):
             # If the corresponding id does not have a name mapped to it, append id.
-            data.append(id_name_lookup.get(data[column_index], data[column_index]))
+            object_id = data[column_index]
+            data.append(get_name(object_id, object_id))
 
         return file_data
 
     @staticmethod
     def convert_to_kib(value, digits):
         """
-        Convert the given value from bytes to kilobytes and rounds up the given value up to one digit.
+        Convert the given value from bytes to kilobytes and format it with the given number of decimals. The value is
+        returned as a fixed point string, so the CSV writer does not have to convert a full precision float again.
 
         Args:
             value (str / float): Value to be converted to Kilobytes.
-            digits (int): The number of decimals to use when rounding the result.
+            digits (int): The number of decimals to use when formatting the result.
 
         Returns:
-            Kb value rounded to the number required number of digits.
+            Kb value formatted with the required number of digits, or 0 formatted the same way if the value could
+            not be converted.
 
         Test:
             test_humanize_base.py::test_convert_to_kib
         """""
         try:
-            return round(float(value) / BYTES_CONVERTER, digits)
+            return '%.*f' % (digits, float(value) / BYTES_CONVERTER)
 
         except (ValueError, TypeError):
             print("Converting to KBytes failed for {} {}".format(value, digits))
-            return 0.0
+            return '%.*f' % (digits, 0)
 
     @staticmethod
     def convert_to_mib(value, digits):
         """
-        Converts a given number to Megabytes and rounds up the given value up to three digits.
+        Converts a given number to Megabytes and formats it with the given number of decimals. The value is returned
+        as a fixed point string, so the CSV writer does not have to convert a full precision float again.
 
         Args:
             value (str): Value to be converted to Megabytes.
-            digits (int): The number of decimals to use when rounding the result.
+            digits (int): The number of decimals to use when formatting the result.
 
         Returns:
-             MB value rounded to the required number of digits.
+             MB value formatted with the required number of digits, or 0 formatted the same way if the value could
+             not be converted.
 
         Test:
             test_humanize_base.py::test_convert_to_mib
         """""
         try:
-            return round(float(value) / BYTES_CONVERTER / BYTES_CONVERTER, digits)
+            return '%.*f' % (digits, float(value) / BYTES_PER_MIB)
 
         except (ValueError, TypeError):
             print("Converting to MBytes failed for {} {}".format(value, digits))
-            return 0
+            return '%.*f' % (digits, 0)
 
     def calculate_tx_rx(self, fe_eth_file_data):
         """
@@ -406,7 +488,7 @@ class Humanize(object):
             fe_eth_file_data (list []): List of records in metrics file.
 
         """""
-        file_data = namedtuple('FileData', fe_eth_file_data[0])
+        file_data = get_record_type('FileData', fe_eth_file_data[0])
 
         for data in fe_eth_file_data[1:]:
             fe_eth_data = file_data._make(data)
@@ -616,6 +698,28 @@ def get_value_from_key(key, lookup, required_key):
     return value if value else key
 
 
+def get_record_type(type_name, header):
+    """
+    Return the namedtuple class for the records of a file with the given header. The class is created once for every
+    header and reused afterwards, so the records of files with the same header, and the records that are converted
+    again after columns are appended, do not create the class again.
+
+    Args:
+        type_name (str): Name of the namedtuple class.
+        header (list[]): Column header names of the file, these are the field names of the class.
+
+    Returns:
+        namedtuple class with the header as its fields.
+    """""
+    cache_key = (type_name, tuple(header))
+    record_type = RECORD_TYPE_CACHE.get(cache_key)
+    if record_type is None:
+        record_type = namedtuple(type_name, header)
+        RECORD_TYPE_CACHE[cache_key] = record_type
+
+    return record_type
+
+
 def get_full_path_for_file(directory_name, file_name):
     """
     This method concatenates directory path and filename using a directory separator.
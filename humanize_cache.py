@@ -22,8 +22,7 @@ Configuration files are used to add user friendly object names.
 from __future__ import print_function
 
 import operator
-from collections import namedtuple
-from humanize_base import Humanize, get_full_path_for_file
+from humanize_base import Humanize, get_full_path_for_file, get_record_type
 from humanize_hardware import append_column_value
 
 
@@ -109,7 +108,6 @@ class HumanizeCache(Humanize):
 
         cache_records_written = self.write_to_file(filename, data_with_cache_utilization)
 
-        print('Records written in {} are {}'.format(filename, cache_records_written))
         return cache_records_written
 
     @staticmethod
@@ -128,7 +126,7 @@ class HumanizeCache(Humanize):
         """""
 
         # Create a namedtuple object using header row from file data.
-        cache = namedtuple('Cache', cache_file_data[0])
+        cache = get_record_type('Cache', cache_file_data[0])
 
         # Comparison between two consecutive records is required to calculate required value.
         # Calculation starts from the second record in the file as first record is a header row hence it is ignored.
@@ -153,7 +151,7 @@ class HumanizeCache(Humanize):
             A list of records with cache_utilization calculated for each record.
         """""
         # Create a namedtuple object using header row from file data.
-        cache = namedtuple('Cache', cache_file_data[0])
+        cache = get_record_type('Cache', cache_file_data[0])
 
         for data in cache_file_data[1:]:
             cache_data = cache(*data)
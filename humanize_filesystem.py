@@ -74,6 +74,4 @@ class HumanizeFileSystem(Humanize):
         # Once the data is modified by appending name in the end it is written in the same file.
         records_written = self.write_to_file(filename, file_data_with_name)
 
-        print('Records written in {} are {}'.format(filename, records_written))
-
         return records_written
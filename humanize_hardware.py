@@ -24,10 +24,10 @@ from __future__ import print_function
 import csv
 import operator
 import re
-from collections import namedtuple
+from itertools import islice
 from operator import add
-from humanize_base import Humanize, get_full_path_for_file, get_value_from_key, COLUMN_HEADER_APPLIANCE_ID, \
-    BYTES_CONVERTER
+from humanize_base import Humanize, get_full_path_for_file, get_record_type, get_value_from_key, \
+    COLUMN_HEADER_APPLIANCE_ID, BYTES_CONVERTER
 
 # Regex to extract drive_type from string.
 # Eg: str = {u'firmware_version': u'GPJ99E5Q', u'size': 1920383410176, u'drive_type': u'NVMe_SSD}
@@ -104,8 +104,6 @@ class HumanizeHardware(Humanize):
         # Once the records are updated it is written back to metrics file.
         records_written = self.write_to_file(filename, data_with_queue)
 
-        print('Records written in {} are {}'.format(filename, records_written))
-
         return records_written
 
     def add_metrics_by_drive_by_appliance_details(self, filename):
@@ -162,8 +160,6 @@ class HumanizeHardware(Humanize):
         # Once the records are updated it is written back to metrics file.
         records_written = self.write_to_file(filename, data_with_queue)
 
-        print('Records written in {} are {}'.format(filename, records_written))
-
         return records_written
 
     def add_iops_details(self, file_data, metric_value):
@@ -182,7 +178,7 @@ class HumanizeHardware(Humanize):
             test_humanize_base.py::test_add_iops_details
         """""
         # Create namedtuple object using the header row.
-        data = namedtuple('FileData', file_data[0])
+        data = get_record_type('FileData', file_data[0])
 
         # Calculate read_iops for every record in metric file
         read_iops = [self.compare_and_calculate_iops(prev, curr, data, 'num_reads', metric_value) for
@@ -194,7 +190,7 @@ class HumanizeHardware(Humanize):
         file_data_with_read_iops = append_column_value(file_data, read_iops, 'read_iops')
 
         # Create namedtuple object after appending read_iops details.
-        data = namedtuple('FileData', file_data[0])
+        data = get_record_type('FileData', file_data[0])
 
         write_iops = [self.compare_and_calculate_iops(prev, curr, data, 'num_writes', metric_value) for
                       prev, curr in
@@ -224,7 +220,7 @@ class HumanizeHardware(Humanize):
             test_humanize_base.py::test_add_mbps_details
         """""
         # Create namedtuple object using the header row.
-        data = namedtuple('FileData', file_data[0])
+        data = get_record_type('FileData', file_data[0])
 
         # Calculate read_mbps for every record in metric file.
         read_mbps = [self.compare_and_calculate_mbps(prev, curr, data, 'blocks_read', metric_value) for
@@ -236,7 +232,7 @@ class HumanizeHardware(Humanize):
         file_data_with_read_mbps = append_column_value(file_data, read_mbps, 'read_mbps')
 
         # Create namedtuple object after appending read_mbps details.
-        data = namedtuple('FileData', file_data[0])
+        data = get_record_type('FileData', file_data[0])
         write_mbps = [self.compare_and_calculate_mbps(prev, curr, data, 'blocks_written', metric_value) for
                       prev, curr in
                       zip(file_data_with_read_mbps[1:],
@@ -264,7 +260,7 @@ class HumanizeHardware(Humanize):
             test_humanize_base.py::test_add_kb_details
         """""
         # Create namedtuple object.
-        data = namedtuple('FileData', file_data[0])
+        data = get_record_type('FileData', file_data[0])
 
         # Calculate read size in KB.
         read_size = [self.calculate_kb_details(record, data, 'read_mbps', 'read_iops') for
@@ -274,7 +270,7 @@ class HumanizeHardware(Humanize):
         data_with_read_size_kb = append_column_value(file_data, read_size, 'read_size_KiB')
 
         # Create namedtuple object after appending read size to perform further processing.
-        data = namedtuple('FileData', file_data[0])
+        data = get_record_type('FileData', file_data[0])
         write_size = [self.calculate_kb_details(record, data, 'write_mbps', 'write_iops') for
                       record in data_with_read_size_kb[2:]]
 
@@ -298,7 +294,7 @@ class HumanizeHardware(Humanize):
             test_humanize_base.py::test_add_rt_details
         """""
         # Create namedtuple object.
-        data = namedtuple('FileData', file_data[0])
+        data = get_record_type('FileData', file_data[0])
 
         # Calculate read response time for every record.
         read_rt = [
@@ -313,7 +309,7 @@ class HumanizeHardware(Humanize):
         data_with_read_rt = append_column_value(file_data, read_rt, 'read_rt')
 
         # Create namedtuple object after appending read rt to perform further processing.
-        data = namedtuple('FileData', file_data[0])
+        data = get_record_type('FileData', file_data[0])
         write_rt = [
             self.compare_and_calculate_rt(prev, curr, data, 'cum_write_response_time', 'write_iops',
                                           metric_value)
@@ -337,7 +333,7 @@ class HumanizeHardware(Humanize):
             A list of records with queue details.
         """""
         # Create namedtuple object using the header row.
-        data = namedtuple('FileData', file_data[0])
+        data = get_record_type('FileData', file_data[0])
 
         # Calculate queue details by doing a metric id comparison.
         queue_details = [self.compare_and_calculate_queue(prev, curr, data, metric_value) for
@@ -585,7 +581,7 @@ class HumanizeHardware(Humanize):
             try:
                 with open(file_name) as file_handle:
                     reader = csv.reader(file_handle)
-                    data = namedtuple('FileData', next(reader))
+                    data = get_record_type('FileData', next(reader))
 
                     for row in reader:
                         file_data = data(*row)
@@ -658,7 +654,7 @@ class HumanizeHardware(Humanize):
 def append_column_value(file_data, column_data_to_append, column_header):
     """
     Append list of values to file data as a column. The list is calculated metrics that appends to file data.
-    A header is also appended to the header column.
+    A header is also appended to the header column. The rows of file data are updated in place.
 
     Args:
         file_data(list[]): File data from the metrics file.
@@ -666,7 +662,7 @@ def append_column_value(file_data, column_data_to_append, column_header):
         column_header (str): Header appended to file data.
 
     Returns:
-        A list of data with another column to append.
+        The same file data list, with another column appended.
 
     Test:
         test_humanize_base.py::test_append_column_value
@@ -680,7 +676,8 @@ def append_column_value(file_data, column_data_to_append, column_header):
     # compare default value is set to 0.
     file_data[1].append(0)
 
-    # Append calculated value to each row in file data.
-    list(map(lambda x, y: x.append(y), file_data[2:], column_data_to_append))
+    # Append calculated value to each row in file data. The rows are paired with islice so the list is not copied.
+    for row, value in zip(islice(file_data, 2, None), column_data_to_append):
+        row.append(value)
 
     return file_data
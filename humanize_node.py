@@ -21,9 +21,8 @@ Configuration files are used to add user friendly object names.
 """""
 from __future__ import print_function
 
-from collections import namedtuple
-from humanize_base import Humanize, get_full_path_for_file, get_value_from_key,  COLUMN_HEADER_NAME, \
-    COLUMN_HEADER_APPLIANCE_ID
+from humanize_base import Humanize, get_full_path_for_file, get_value_from_key, \
+    COLUMN_HEADER_NAME, COLUMN_HEADER_APPLIANCE_ID
 from humanize_appliance import APPLIANCE_FILENAME, SERIAL_NUMBER, TYPE, MODEL, SERVICE_TAG, MODE
 
 COLUMN_HEADER_NODE_ID = 'node_id'
@@ -100,8 +99,6 @@ class HumanizeNode(Humanize):
 
         fe_eth_records = self.write_to_file(filename, data_with_tx_rx_details)
 
-        print('Records written in {} are {}'.format(filename, fe_eth_records))
-
         return fe_eth_records
 
     @staticmethod
@@ -165,23 +162,13 @@ class HumanizeNode(Humanize):
             print("Could not process file {}".format(filename))
             return 0
 
-        # Add appliance id and node name for every record.
-        data_with_appliance_and_node = self.add_appliance_and_node_name(fe_fc_file_data, self.node_lookup_dict)
-
-        # Read size in KiB, write size in KiB and IO size in KiB is calculated for each record.
-        data_with_kib_calculations = self.calculate_kib_for_fe_fc_node(data_with_appliance_and_node)
-
-        # For each entry in metrics file total bandwidth, read bandwidth and write bandwidth is calculated in MiBPS.
-        data_with_mib_calculations = self.calculate_mib_for_fe_fc_node(data_with_kib_calculations)
-
-        # For each entry in metrics file calculate unaligned read, write and total bandwidth in MiBPS.
-        data_with_unaligned_details = self.add_unaligned_details(data_with_mib_calculations)
+        # Appliance id and node name, sizes in KiB, bandwidth and unaligned bandwidth in MiBPS are added to every
+        # record in a single pass over the file data.
+        data_with_unaligned_details = self.augment_fe_fc_node_records(fe_fc_file_data, self.node_lookup_dict)
 
         # Once the records are updated it is written back to metrics file.
         records_written = self.write_to_file(filename, data_with_unaligned_details)
 
-        print('Records written in {} are {}'.format(filename, records_written))
-
         return records_written
 
     def add_metrics_node_details(self, filename):
@@ -217,8 +204,6 @@ class HumanizeNode(Humanize):
         # Once the records are updated it is written back to metrics file.
         node_records = self.write_to_file(filename, file_data_with_node_name)
 
-        print('Records written in {} are {}'.format(filename, node_records))
-
         return node_records
 
     def add_node_details(self, file_data, node_lookup, header_name):
@@ -239,147 +224,61 @@ class HumanizeNode(Humanize):
         # Get node id index.
         node_id_index = file_data[0].index(COLUMN_HEADER_NODE_ID)
 
+        # Bind the lookup function to a local name as it is called for every record.
+        _gv = get_value_from_key
+
         # For every record append node name using node lookup.
         for data in file_data[1:]:
-            node_name = get_value_from_key(data[node_id_index], node_lookup, COLUMN_HEADER_NAME)
+            node_name = _gv(data[node_id_index], node_lookup, COLUMN_HEADER_NAME)
             data.append(node_name)
 
         return file_data
 
-    @staticmethod
-    def add_appliance_and_node_name(fe_fc_file_data, node_lookup):
-        """
-        Adds appliance id and node name by performing a lookup using node_id to each record in file.
-
-        Args:
-            fe_fc_file_data(list[]): A list of records in metric file data.
-            node_lookup(dict{}):  A dictionary with key as node id and value as appliance id and node name.
-
-        Returns:
-            A list of file records with appliance id and node name.
-
-        Test:
-            test_humanize_base.py::test_add_appliance_and_node_name.
-        """""
-        fe_fc_file_data[0].extend(['appliance', COLUMN_HEADER_NAME])
-
-        # Get index for node id.
-        node_id_index = fe_fc_file_data[0].index(COLUMN_HEADER_NODE_ID)
-
-        for data in fe_fc_file_data[1:]:
-            app_id = get_value_from_key(data[node_id_index], node_lookup, COLUMN_HEADER_APPLIANCE_ID)
-            data.append(app_id)
-
-            node_name = get_value_from_key(data[node_id_index], node_lookup, COLUMN_HEADER_NAME)
-            data.append(node_name)
-
-        return fe_fc_file_data
-
-    def calculate_kib_for_fe_fc_node(self, fe_fc_file_data):
+    def augment_fe_fc_node_records(self, fe_fc_file_data, node_lookup):
         """
-        Converts bytes to KB for fe fc node metric file. Appends headers for each Kb details calculated.
+        Adds appliance id and node name, read, write and IO size in KiB, read, write and total bandwidth in MiBPS and
+        unaligned read, write and total bandwidth in MiBPS to every record of the fe fc node metrics file. Every
+        record is visited only once.
 
         Args:
             fe_fc_file_data (list[]): A list of records in metrics file.
+            node_lookup (dict{}): A dictionary with key as node id and value as appliance id and node name.
 
         Returns:
-            A list of file records with bytes converted to KB.
-
-        Test:
-            test_humanize_base.py::test_calculate_kib_for_fe_fc_node
+            A list of records with appliance, node, KiB and MiBPS details.
         """""
-        file_data = namedtuple('FileData', fe_fc_file_data[0])
-
-        for record in fe_fc_file_data[1:]:
-            data = file_data(*record)
-
-            try:
-                read_size_kib = self.convert_to_kib(round(float(data.avg_read_size), 2), 2)
-            except ValueError:
-                read_size_kib = 0
-
-            try:
-                write_size_kib = self.convert_to_kib(round(float(data.avg_write_size), 2), 2)
-            except ValueError:
-                write_size_kib = 0
+        header = fe_fc_file_data[0]
 
-            try:
-                io_size_kib = self.convert_to_kib(round(float(data.avg_io_size), 2), 2)
-            except ValueError:
-                io_size_kib = 0
+        # Resolve the column indices once for the whole file.
+        node_id_index = header.index(COLUMN_HEADER_NODE_ID)
+        size_indices = [header.index(column) for column in ('avg_read_size', 'avg_write_size', 'avg_io_size')]
+        bandwidth_indices = [header.index(column) for column in
+                             ('read_bandwidth', 'write_bandwidth', 'total_bandwidth', 'unaligned_read_bandwidth',
+                              'unaligned_write_bandwidth', 'unaligned_bandwidth')]
 
-            record.extend([read_size_kib, write_size_kib, io_size_kib])
-
-        fe_fc_file_data[0].extend(['read_size_KiB', 'write_size_KiB', 'io_size_KiB'])
-
-        return fe_fc_file_data
-
-    def calculate_mib_for_fe_fc_node(self, fe_fc_file_data):
-        """
-        Converts bandwidth values from bytes to MB per second in metric files.
-
-        Args:
-            fe_fc_file_data(list[]): List of records in metric file data.
-
-        Returns:
-            A list of records with bandwidth values converted from bytes to MB per second.
-        """""
-        file_data = namedtuple('FileData', fe_fc_file_data[0])
-
-        for record in fe_fc_file_data[1:]:
-            data = file_data(*record)
-
-            try:
-                read_mibps = self.convert_to_mib(data.read_bandwidth, 2)
-            except ValueError:
-                read_mibps = 0
-
-            try:
-                write_mibps = self.convert_to_mib(data.write_bandwidth, 2)
-            except ValueError:
-                write_mibps = 0
-
-            try:
-                total_mibps = self.convert_to_mib(data.total_bandwidth, 2)
-            except ValueError:
-                total_mibps = 0
-
-            record.extend([read_mibps, write_mibps, total_mibps])
-
-        fe_fc_file_data[0].extend(['read_MiBPS', 'write_MiBPS', 'total_MiBPS'])
-
-        return fe_fc_file_data
-
-    def add_unaligned_details(self, fe_fc_file_data):
-        """
-        Adds unaligned details from the fe fc metrics file. User friendly rates are added converting bytes per second
-        to megabytes per second. Unaligned read, write and total bandwidth is equated to user friendly values.
-
-        Args:
-            fe_fc_file_data (list): List of records in metrics file.
-
-        Returns:
-            A list of records with unaligned read, write and total bandwidth details.
-
-        Test:
-            test_humanize_base.py::test_add_unaligned_details
-        """""
-        file_data = namedtuple('FileData', fe_fc_file_data[0])
+        _gv = get_value_from_key
+        _kib = self.convert_to_kib
+        _mib = self.convert_to_mib
 
         for record in fe_fc_file_data[1:]:
-            # Convert each record to namedtuple before processing.
-            data = file_data(*record)
+            node_id = record[node_id_index]
+            values = [_gv(node_id, node_lookup, COLUMN_HEADER_APPLIANCE_ID),
+                      _gv(node_id, node_lookup, COLUMN_HEADER_NAME)]
 
-            unaligned_read_bandwidth_mibps = self.convert_to_mib(data.unaligned_read_bandwidth, 2)
-            record.append(unaligned_read_bandwidth_mibps)
+            for index in size_indices:
+                try:
+                    values.append(_kib(round(float(record[index]), 2), 2))
+                except ValueError:
+                    values.append(0)
 
-            unaligned_write_bandwidth_mibps = self.convert_to_mib(data.unaligned_write_bandwidth, 2)
-            record.append(unaligned_write_bandwidth_mibps)
+            values.extend([_mib(record[index], 2) for index in bandwidth_indices])
 
-            unaligned_bandwidth_mibps = self.convert_to_mib(data.unaligned_bandwidth, 2)
-            record.append(unaligned_bandwidth_mibps)
+            record.extend(values)
 
-        fe_fc_file_data[0].extend(['unaligned_read_bandwidth_MiBPS', 'unaligned_write_bandwdith_MiBPS',
-                                   'unaligned_bandwidth_MiBPS'])
+        header.extend(['appliance', COLUMN_HEADER_NAME,
+                       'read_size_KiB', 'write_size_KiB', 'io_size_KiB',
+                       'read_MiBPS', 'write_MiBPS', 'total_MiBPS',
+                       'unaligned_read_bandwidth_MiBPS', 'unaligned_write_bandwdith_MiBPS',
+                       'unaligned_bandwidth_MiBPS'])
 
         return fe_fc_file_data
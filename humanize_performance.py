@@ -8,12 +8,22 @@
 # humanize_performance.py
 #
 ###########################################################################
-from __future__ import print_function
+import csv
+import io
+import multiprocessing
 import operator
+import os
 from collections import namedtuple
 from datetime import datetime, timedelta
-from humanize_base import Humanize, get_full_path_for_file
-from humanize_hardware import append_column_value
+from itertools import islice
+from sys import intern
+from humanize_base import Humanize, get_full_path_for_file, OUTPUT_DIR
+
+try:
+    # ciso8601 is optional. When it is installed the timestamps are parsed in C, otherwise they are sliced.
+    import ciso8601
+except ImportError:
+    ciso8601 = None
 
 PERFORMANCE_COUNTER_APPLIANCE_5_SEC = 'performance_counters_by_appliance_five_secs.csv'
 PERFORMANCE_COUNTER_CLUSTER_5_SEC = 'performance_counters_by_cluster_five_secs.csv'
@@ -38,14 +48,137 @@ PERFORMANCE_COUNTER_DRIVE_5_SEC = 'performance_counters_by_drive_by_node_five_se
 PERFORMANCE_COUNTER_NFS_5_SEC = 'performance_counters_nfs_by_node_five_secs.csv'
 PERFORMANCE_COUNTER_SMB_5_SEC = 'performance_counters_smb_by_node_five_secs.csv'
 
+# Timestamps of the records are converted to seconds since this time for the rate calculations.
+EPOCH = datetime(1970, 1, 1)
+
+# Maximum number of parsed timestamps to cache, a week of five second samples.
+TIMESTAMP_CACHE_SIZE = 7 * 24 * 60 * 12
+
+# The columns of the five second metric files and their data types, in the order of the columns in the file. The
+# *_record methods that convert the csv values back to their data types are generated from these schemas.
+RECORD_SCHEMAS = {
+    'appliance_record': (
+        ('appliance_id', 'str'), ('timestamp', 'datetime'), ('read_latency', 'int'), ('write_latency', 'int'),
+        ('read_ios', 'int'), ('write_ios', 'int'), ('read_bytes', 'int'), ('write_bytes', 'int'),
+        ('mirror_write_ios', 'int'), ('mirror_write_latency', 'int'), ('mirror_overhead_latency', 'int'),
+        ('mirror_write_bytes', 'int'), ('idle_ticks', 'int'), ('total_ticks', 'int')),
+    'cluster_record': (
+        ('timestamp', 'datetime'), ('cluster_id', 'str'), ('read_latency', 'int'), ('write_latency', 'int'),
+        ('read_ios', 'int'), ('write_ios', 'int'), ('read_bytes', 'int'), ('write_bytes', 'int'),
+        ('mirror_write_ios', 'int'), ('mirror_write_latency', 'int'), ('mirror_overhead_latency', 'int'),
+        ('mirror_write_bytes', 'int'), ('idle_ticks', 'int'), ('total_ticks', 'int')),
+    'node_record': (
+        ('node_id', 'str'), ('appliance_id', 'str'), ('timestamp', 'datetime'), ('read_latency', 'int'),
+        ('write_latency', 'int'), ('read_ios', 'int'), ('write_ios', 'int'), ('read_bytes', 'int'),
+        ('write_bytes', 'int'), ('mirror_write_ios', 'float'), ('mirror_write_latency', 'float'),
+        ('mirror_overhead_latency', 'float'), ('mirror_write_bytes', 'float'), ('idle_ticks', 'int'),
+        ('total_ticks', 'int')),
+    'initiator_record': (
+        ('initiator_id', 'str'), ('timestamp', 'datetime'), ('read_latency', 'int'), ('write_latency', 'int'),
+        ('read_ios', 'int'), ('write_ios', 'int'), ('read_bytes', 'int'), ('write_bytes', 'int')),
+    'fe_fc_port_record': (
+        ('node_id', 'str'), ('appliance_id', 'str'), ('fe_port_id', 'str'), ('timestamp', 'datetime'),
+        ('read_latency', 'int'), ('write_latency', 'int'), ('read_ios', 'int'), ('write_ios', 'int'),
+        ('read_bytes', 'int'), ('write_bytes', 'int'), ('total_logins', 'int'), ('dumped_frames', 'int'),
+        ('loss_of_signal_count', 'int'), ('invalid_crc_count', 'int'), ('loss_of_sync_count', 'int'),
+        ('invalid_tx_word_count', 'int'), ('prim_seq_prot_err_count', 'int'), ('link_failure_count', 'int')),
+    'fe_fc_node_record': (
+        ('node_id', 'str'), ('appliance_id', 'str'), ('timestamp', 'datetime'), ('read_latency', 'int'),
+        ('write_latency', 'int'), ('read_ios', 'int'), ('write_ios', 'int'), ('read_bytes', 'int'),
+        ('write_bytes', 'int'), ('total_logins', 'int'), ('dumped_frames', 'int'), ('loss_of_signal_count', 'int'),
+        ('invalid_crc_count', 'int'), ('loss_of_sync_count', 'int'), ('invalid_tx_word_count', 'int'),
+        ('prim_seq_prot_err_count', 'int'), ('link_failure_count', 'int')),
+    'fe_eth_port_record': (
+        ('fe_port_id', 'str'), ('node_id', 'str'), ('appliance_id', 'str'), ('timestamp', 'datetime'),
+        ('pkt_rx', 'int'), ('pkt_tx', 'int'), ('bytes_tx', 'int'), ('bytes_rx', 'int'),
+        ('pkt_rx_no_buffer_error', 'int'), ('pkt_rx_crc_error', 'int'), ('pkt_tx_error', 'int')),
+    'fe_eth_node_record': (
+        ('node_id', 'str'), ('appliance_id', 'str'), ('timestamp', 'datetime'), ('pkt_rx', 'int'), ('pkt_tx', 'int'),
+        ('bytes_tx', 'int'), ('bytes_rx', 'int'), ('pkt_rx_no_buffer_error', 'int'), ('pkt_rx_crc_error', 'int'),
+        ('pkt_tx_error', 'int')),
+    'drive_record': (
+        ('timestamp', 'datetime'), ('appliance_id', 'str'), ('node_id', 'str'), ('drive_id', 'str'),
+        ('read_latency', 'int'), ('write_latency', 'int'), ('read_ios', 'int'), ('write_ios', 'int'),
+        ('read_bytes', 'int'), ('write_bytes', 'int'), ('queue_len', 'int'), ('state', 'str')),
+    'cache_record': (
+        ('timestamp', 'datetime'), ('appliance_id', 'str'), ('cache_type', 'str'), ('node_id', 'str'),
+        ('pages_local', 'int'), ('pages_peer', 'int'), ('total_bytes', 'int'), ('dirty_pages_local', 'int'),
+        ('dirty_pages_peer', 'int'), ('total_dirty_bytes', 'int'), ('pages_being_held', 'int'),
+        ('flush_page_merges', 'int'), ('waits_for_pages', 'int'), ('fast_page_lookups', 'int'),
+        ('access_lookups', 'int'), ('cache_lookups', 'int'), ('cache_fast_lookups', 'int'), ('flush_requests', 'int'),
+        ('pages_holds', 'int_or_zero'), ('page_holds_rolledback', 'int'), ('pages_flushed', 'int'),
+        ('load_during_holds', 'int'), ('flush_zeros', 'int'), ('flush_completes', 'int'), ('forced_flushes', 'int'),
+        ('locked_retried', 'int'), ('fua_locked_retried', 'int'), ('free_pages', 'int'),
+        ('cpydff_tail_wait_current', 'int'), ('cpydff_tail_wait_highwtr', 'int'), ('cpydff_num_of_timeouts', 'int'),
+        ('cpydff_largest_tail_lsn', 'int'), ('cpydff_num_of_flushes', 'int'), ('suspended', 'int'),
+        ('suspend_calls', 'int'), ('resume_calls', 'int'), ('unaligned_ios', 'int'), ('drive_reads', 'int'),
+        ('page_overwrites', 'int'), ('page_read_hits', 'int'), ('page_read_misses', 'int'),
+        ('page_read_invalid_found', 'int'), ('page_write_invalid_found', 'int'), ('page_writes_all', 'int'),
+        ('page_write_misses', 'int'), ('page_write_hits', 'int'), ('page_write_hits_dirty', 'int'),
+        ('page_read_pure_hits', 'int'), ('page_read_hit_locks', 'int'), ('page_read_log_loads', 'int'),
+        ('page_read_mapper_loads', 'int'), ('page_scan_invalidates', 'int'), ('ext_rec_scan_requeues', 'int'),
+        ('ext_rec_scan_completed', 'int'), ('ext_rec_aborted', 'int'), ('max_ext_rec_scan_time', 'int'),
+        ('ext_page_scan_evaluated', 'int'), ('ontk_pgclns_tlmv', 'int'), ('ontk_pgclns_cpblow', 'int'),
+        ('ontk_pgclns_ondmnd', 'int'), ('ontk_pgclns_cachethtl', 'int'), ('offtk_pgclns_tlmv', 'int'),
+        ('offtk_pgclns_cpblow', 'int'), ('offtk_pgclns_ondmnd', 'int'), ('offtk_pgclns_cachethtl', 'int'),
+        ('cpb_getbuf_zeroes', 'int'), ('skipped_pgclns_bthnodes', 'int'), ('clean_reschedules', 'int'),
+        ('ios_started', 'int'), ('ios_completed', 'int'), ('ios_active', 'int'), ('log_full_waits', 'int'),
+        ('cache_full_waits', 'int'), ('cpydff_total_requests', 'int'), ('cpydff_total_tail_waits', 'int'),
+        ('peerpdb_failed_tryget_retry', 'int'), ('hold_try_access_failure', 'int')),
+    'host_record': (
+        ('host_id', 'str'), ('timestamp', 'datetime'), ('read_latency', 'int'), ('write_latency', 'int'),
+        ('read_ios', 'int'), ('write_ios', 'int'), ('read_bytes', 'int'), ('write_bytes', 'int')),
+    'host_group_record': (
+        ('hg_id', 'str'), ('timestamp', 'datetime'), ('read_latency', 'int'), ('write_latency', 'int'),
+        ('read_ios', 'int'), ('write_ios', 'int'), ('read_bytes', 'int'), ('write_bytes', 'int')),
+    'volume_record': (
+        ('volume_id', 'str'), ('timestamp', 'datetime'), ('current_appliance_id', 'str'), ('appliance_id', 'str'),
+        ('read_latency', 'int'), ('write_latency', 'int'), ('read_ios', 'int'), ('write_ios', 'int'),
+        ('read_bytes', 'int'), ('write_bytes', 'int'), ('mirror_write_ios', 'int'), ('mirror_overhead_latency', 'int'),
+        ('mirror_write_bytes', 'int')),
+    'vg_record': (
+        ('vg_id', 'str'), ('current_appliance_id', 'str'), ('appliance_id', 'str'), ('timestamp', 'datetime'),
+        ('read_latency', 'int'), ('write_latency', 'int'), ('read_ios', 'int'), ('write_ios', 'int'),
+        ('read_bytes', 'int'), ('write_bytes', 'int')),
+    'vm_record': (
+        ('vm_id', 'str'), ('timestamp', 'datetime'), ('read_latency', 'int'), ('write_latency', 'int'),
+        ('read_ios', 'int'), ('write_ios', 'int'), ('read_bytes', 'int'), ('write_bytes', 'int')),
+    'ip_port_record': (
+        ('ip_port_id', 'str'), ('appliance_id', 'str'), ('timestamp', 'datetime'), ('read_latency', 'int'),
+        ('write_latency', 'int'), ('read_ios', 'int'), ('write_ios', 'int'), ('read_bytes', 'int'),
+        ('write_bytes', 'int')),
+    'sdnas_nfs_record': (
+        ('node_id', 'str'), ('appliance_id', 'str'), ('timestamp', 'datetime'), ('read_ios', 'int'),
+        ('write_ios', 'int'), ('read_latency', 'int'), ('write_latency', 'int'), ('read_bytes', 'int'),
+        ('write_bytes', 'int')),
+    'sdnas_smb_record': (
+        ('node_id', 'str'), ('appliance_id', 'str'), ('timestamp', 'datetime'), ('read_ios', 'int'),
+        ('write_ios', 'int'), ('read_latency', 'int'), ('write_latency', 'int'), ('read_bytes', 'int'),
+        ('write_bytes', 'int'), ('total_calls', 'int'), ('current_tcp_connections', 'int'))
+}
+
+# The source of the conversion for each data type of a schema, formatted with the csv value and the owner of the
+# str_to_datetime method. The str columns are ids, types and states with only a handful of distinct values in a file,
+# so they are interned and all records of the same object share one string.
+RECORD_CONVERSIONS = {
+    'str': 'intern({0})',
+    'datetime': '{1}str_to_datetime({0})',
+    'int': 'int({0}, 10)',
+    'float': 'float({0})',
+    'int_or_zero': 'int({0}, 10) if {0} else 0'
+}
+
 
 class HumanizeFiveSecMetrics(Humanize):
 
     lookup_dict = dict()
     additional_cols = list()
 
+    # Parsed timestamps, shared by all the metric files converted in this process.
+    timestamp_cache = dict()
+
     def __init__(self, input_directory=None):
-        super(HumanizeFiveSecMetrics, self).__init__(input_directory)
+        super().__init__(input_directory)
 
         # Create a list of tuples consisting of (id, function name, column header, column name, rate name)
         # These will be used as follow:
@@ -85,40 +218,40 @@ class HumanizeFiveSecMetrics(Humanize):
         # 2. A tuple of header columns used for sorting (example 1: cluster_id, timestamp)
         #                                               (example 2: appliance_id, cache_type, timestamp).
         # 3. A function name that will convert the csv values from all string values to the appropriate data types.
-        # 4. A list of function id's from self.additional_cols to call for this particular metric file.
+        # 4. A frozenset of function id's from self.additional_cols to call for this particular metric file.
         self.metric_files = [
             (PERFORMANCE_COUNTER_APPLIANCE_5_SEC, ('appliance_id', 'timestamp'), self.appliance_record,
-             list(range(1, 14, 1))),
+             frozenset(range(1, 14))),
             (PERFORMANCE_COUNTER_CLUSTER_5_SEC, ('cluster_id', 'timestamp'), self.cluster_record,
-             list(range(1, 14, 1))),
+             frozenset(range(1, 14))),
             (PERFORMANCE_COUNTER_HOST_5_SEC, ('host_id', 'timestamp'), self.host_record,
-             list(range(1, 7, 1))),
+             frozenset(range(1, 7))),
             (PERFORMANCE_COUNTER_HOST_GROUP_5_SEC, ('hg_id', 'timestamp'), self.host_group_record,
-             list(range(1, 7, 1))),
+             frozenset(range(1, 7))),
             (PERFORMANCE_COUNTER_INITIATOR_5_SEC, ('initiator_id', 'timestamp'), self.initiator_record,
-             list(range(1, 7, 1))),
+             frozenset(range(1, 7))),
             (PERFORMANCE_COUNTER_IP_PORT_5_SEC, ('ip_port_id', 'timestamp'), self.ip_port_record,
-             list(range(1, 7, 1))),
+             frozenset(range(1, 7))),
             (PERFORMANCE_COUNTER_NODE_5_SEC, ('node_id', 'timestamp'), self.node_record,
-             list(range(1, 14, 1))),
+             frozenset(range(1, 14))),
             (PERFORMANCE_COUNTER_FC_NODE_5_SEC, ('node_id', 'timestamp'), self.fe_fc_node_record,
-             list(range(1, 13, 1)) + list(range(14, 21, 1))),
+             frozenset(range(1, 13)) | frozenset(range(14, 21))),
             (PERFORMANCE_COUNTER_FC_PORT_5_SEC, ('fe_port_id', 'timestamp'), self.fe_fc_port_record,
-             list(range(1, 13, 1)) + list(range(14, 21, 1))),
+             frozenset(range(1, 13)) | frozenset(range(14, 21))),
             (PERFORMANCE_COUNTER_VOL_5_SEC, ('volume_id', 'timestamp'), self.volume_record,
-             list(range(1, 7, 1))),
+             frozenset(range(1, 7))),
             (PERFORMANCE_COUNTER_VG_5_SEC, ('vg_id', 'timestamp'), self.vg_record,
-             list(range(1, 7, 1))),
+             frozenset(range(1, 7))),
             (PERFORMANCE_COUNTER_VM_5_SEC, ('vm_id', 'timestamp'), self.vm_record,
-             list(range(1, 7, 1))),
+             frozenset(range(1, 7))),
             (PERFORMANCE_COUNTER_ETH_NODE_5_SEC, ('node_id', 'timestamp'), self.fe_eth_node_record,
-             list(range(21, 28, 1))),
+             frozenset(range(21, 28))),
             (PERFORMANCE_COUNTER_ETH_PORT_5_SEC, ('fe_port_id', 'timestamp'), self.fe_eth_port_record,
-             list(range(21, 28, 1))),
+             frozenset(range(21, 28))),
             (PERFORMANCE_COUNTER_NFS_5_SEC, ('node_id', 'appliance_id', 'timestamp'), self.sdnas_nfs_record,
-             list(range(1, 13, 1))),
+             frozenset(range(1, 13))),
             (PERFORMANCE_COUNTER_SMB_5_SEC, ('node_id', 'appliance_id', 'timestamp'), self.sdnas_smb_record,
-             list(range(1, 13, 1)))
+             frozenset(range(1, 13)))
         ]
 
     def add_details(self, filename):
@@ -128,127 +261,331 @@ class HumanizeFiveSecMetrics(Humanize):
         Args:
             filename (str): Name of metrics file that is to update (ignored here)
 
+        Returns:
+            Total number of records written across all metric files.
+
         Exception:
             ValueError if file not found.
         """""
         del filename
+        return sum(records_written for _, records_written in self.convert_metric_files())
+
+    def convert_metric_files(self):
+        """
+        Take the list of metric files and convert them to rate values.
+
+        Returns:
+            A list of (metric file name, records written) tuples, one for every metric file.
+        """""
         input_file = 0
         sort_criteria = 1
         translation_func = 2
         funcs_to_call = 3
 
-        for records_to_convert in self.metric_files:
-            self.convert_metrics_to_rates(records_to_convert[input_file],
-                                          list(records_to_convert[sort_criteria]),
-                                          records_to_convert[translation_func], records_to_convert[funcs_to_call])
+        # The metric files share no state, so they are converted in parallel by a pool of worker processes.
+        arguments = [(self, records_to_convert[input_file], list(records_to_convert[sort_criteria]),
+                      records_to_convert[translation_func], records_to_convert[funcs_to_call])
+                     for records_to_convert in self.metric_files]
+
+        workers = min(len(arguments), multiprocessing.cpu_count())
+        if workers > 1:
+            pool = multiprocessing.Pool(processes=workers)
+            try:
+                records_written = pool.map(convert_metric_file, arguments)
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            records_written = [convert_metric_file(argument) for argument in arguments]
+
+        return list(zip([records_to_convert[input_file] for records_to_convert in self.metric_files], records_written))
 
     def convert_metrics_to_rates(self, filename, sort_criteria, translate_func, valid_func_list):
         """
         Adds additional columns to performance counter files by converting metric values to rate values.
-        The data is first sorted by id and timestamp.
+        The data is first sorted by id and timestamp, unless the file is already sorted.
 
         Args:
             filename (str): Name of the performance counter file to be updated.
             sort_criteria ([int]): A list of indices to sort the csv table upon.
             translate_func: Function to convert the csv elements back to their appropriate datatype values.
-            valid_func_list ([int]): A list of indices that reference the functions in additional_cols to invoke
+            valid_func_list (frozenset): A set of indices that reference the functions in additional_cols to invoke
                for the specific metric file.
 
         Returns:
             records_written: Records written in metric file system file.
 
         """""
+        column_id = 0
+        function_name = 1
+        column_to_add = 2
+        column_numerator = 3
+        column_denominator = 4
+
+        # Only the additional columns in the valid func list are calculated for this metric file.
+        calcs = [(column[function_name], column[column_to_add], column[column_numerator], column[column_denominator])
+                 for column in self.additional_cols if column[column_id] in valid_func_list]
+
+        # The metric files are usually written sorted by id and timestamp. Such a file is converted while it is
+        # streamed to the output file, only a file that is not sorted is read in full and sorted.
+        # The record conversion is specialized once for the file, instead of unpacking every row into a method call.
+        convert_record = self.get_record_converter(translate_func)
+
+        rate_records_written = self.stream_metrics_to_rates(filename, sort_criteria, convert_record, calcs)
+        if rate_records_written is not None:
+            return rate_records_written
+
         input_filename = get_full_path_for_file(self.PROCESSED_METRICS_OUTPUT_DIR, filename)
 
-        # A list of records from cache by node metrics file
+        # A list of records from the metrics file, already converted to their appropriate data type values.
         try:
-            five_sec_file_data = self.read_file_data(input_filename)
+            five_sec_file_data = self.read_typed_file_data(input_filename, convert_record)
 
         except IOError:
             # Return if file could not be processed.
             print("Could not process file {}".format(filename))
             return 0
 
+        except (IndexError, ValueError) as err:
+            # Return if a record could not be converted.
+            print("The file {} could not be processed due to {}".format(filename, err))
+            return 0
+
         # Need to ensure adjacent rows are same id, and then successive sample times.
         try:
             # Convert the column header names as the sort criteria into column index values.
-            sort_indices = map(lambda x: five_sec_file_data[0].index(x), sort_criteria)
-
-            # Convert the record of string values back to one with appropriate data type values.
-            five_sec_file_data[1:] = [translate_func(*row) for row in five_sec_file_data[1:]]
-            five_sec_file_data[1:] = sorted(five_sec_file_data[1:], key=operator.itemgetter(*sort_indices))
+            # The indices are kept in a tuple, they are used for the sort and again for every rate calculation.
+            sort_indices = tuple(five_sec_file_data[0].index(x) for x in sort_criteria)
+
+            # The sort criteria contain one or more id values and the last is the timestamp. The id values of a record
+            # are read with a single itemgetter call when two records are compared.
+            id_indices = sort_indices[:-1]
+            get_ids = operator.itemgetter(*id_indices)
+
+            # The records are sorted in place. The header row is set aside for the sort, so the records are not
+            # copied out of the list and back again.
+            header = five_sec_file_data.pop(0)
+            five_sec_file_data.sort(key=operator.itemgetter(*sort_indices))
+            five_sec_file_data.insert(0, header)
+
+            # Every record is converted to a namedtuple once for the whole file. The rate calculations only read the
+            # original columns, so these records stay valid while calculated columns are appended to the rows.
+            # The rows keep the datetime that is written to the output file.
+            metrics = namedtuple('Metrics', five_sec_file_data[0])
+            timestamp_index = sort_indices[-1]
+            records = [self.make_record(metrics, row, timestamp_index)
+                       for row in islice(five_sec_file_data, 1, None)]
 
         except (IndexError, ValueError) as err:
             # Return if the index to sort upon is not valid
             print("The file {} could not be processed due to {}".format(filename, err))
             return 0
 
-        column_id = 0
-        function_name = 1
-        column_to_add = 2
-        column_numerator = 3
-        column_denominator = 4
-        for column in self.additional_cols:
-            # If the additional column is in the valid func list, then perform the metrics to rate calculations.
-            if column[column_id] in valid_func_list:
-                five_sec_file_data = self.add_calculated_value(five_sec_file_data,
-                                                               column[function_name], column[column_to_add],
-                                                               column[column_numerator], column[column_denominator],
-                                                               sort_indices)
+        five_sec_file_data = self.add_all_calculated_values(five_sec_file_data, records, calcs, get_ids)
 
         rate_records_written = self.write_to_file(filename, five_sec_file_data)
 
-        print('Records written in {} are {}'.format(filename, rate_records_written))
         return rate_records_written
 
     @staticmethod
-    def add_calculated_value(metric_file_data, func_name, col_to_add, col_numerator, col_denominator, compare_indices):
+    def read_typed_file_data(filename, convert_record):
+        """
+        Csv file is read with the help of a CSV reader and every record is converted to its appropriate data type
+        values while it is read. The list of string values for a record is dropped as soon as it is converted,
+        so the whole file is never held in memory twice.
+
+        Args:
+            filename (str): Name of file whose data is converted to list and returned.
+            convert_record: Function to convert a csv row back to a list of its appropriate datatype values.
+
+        Returns:
+            A list with the header followed by the converted records in metric file.
+        """""
+        with open(filename) as file_reader_handle:
+            file_reader = csv.reader(file_reader_handle)
+
+            # The header keeps its string values, only the records are converted.
+            file_data = [next(file_reader, [])]
+            file_data.extend(convert_record(row) for row in file_reader)
+            return file_data
+
+    def add_all_calculated_values(self, metric_file_data, records, calcs, get_ids):
         """
-        Adds value calculated from the function.
+        Adds the values calculated from all the functions in a single pass over the records.
 
         Args:
          metric_file_data (list[]): Records present in metrics file.
-         func_name (func): Function name to calculate field.
-         col_to_add (str): Name of the column to add to the table
-         col_numerator (str): Column name of the numerator to be used in the rate calculation
-         col_denominator (str): Column name of the denominator to be used in the rate calculation
-         compare_indices (list[]): indices of the record id label to use for comparison purposes.
+         records (list[]): The data records of the metrics file as namedtuples, in the same order as metric_file_data.
+         calcs (list[]): Tuples of (function name, column to add, numerator column, denominator column) to calculate.
+         get_ids (operator.itemgetter): Returns the record id labels to use for comparison purposes.
 
         Returns:
             A list with values appended in the end of each record.
         """""
+        header = metric_file_data[0]
+        calc_indices = self.get_calc_indices(header, calcs)
+
+        # Value headers are appended to the header row.
+        header.extend([col_to_add for _, col_to_add, _, _ in calcs])
+
+        if len(metric_file_data) < 2:
+            return metric_file_data
+
+        # As the columns to append are calculated comparing values from previous row and since first row has no
+        # values to compare default value is set to 0.
+        metric_file_data[1].extend([0] * len(calcs))
+
+        # Comparison between two consecutive records is required to calculate the values. The records are paired
+        # with islice so the list is not copied.
+        no_values = [0.0] * len(calcs)
+        for row, t0, t1 in zip(islice(metric_file_data, 2, None), records, islice(records, 1, None)):
+            row.extend(self.calculate_values(t0, t1, calc_indices, get_ids, no_values))
+
+        return metric_file_data
+
+    def stream_metrics_to_rates(self, filename, sort_criteria, convert_record, calcs):
+        """
+        Adds the calculated columns to a performance counter file that is already sorted by id and timestamp. Every
+        record is written to the output file as soon as it is read, only the previous record is kept in memory.
+
+        Args:
+            filename (str): Name of the performance counter file to be updated.
+            sort_criteria ([int]): A list of indices to sort the csv table upon.
+            convert_record: Function to convert a csv row back to a list of its appropriate datatype values.
+            calcs (list[]): Tuples of (function name, column to add, numerator column, denominator column) to calculate.
+
+        Returns:
+            records_written: Records written in metric file, or None if the file has to be sorted first or could not
+            be processed. The caller then converts the file with the sorting path, which also reports any errors.
+        """""
+        input_filename = get_full_path_for_file(self.PROCESSED_METRICS_OUTPUT_DIR, filename)
+        output_filename = get_full_path_for_file(OUTPUT_DIR, filename)
+        open_mode, kwargs = self.get_mode_and_newline()
+        records_written = None
 
-        # Create a namedtuple object using header row from file data.
-        header = namedtuple('Metrics', metric_file_data[0])
+        try:
+            with open(input_filename) as file_reader_handle:
+                file_reader = csv.reader(file_reader_handle)
+                header = next(file_reader, None)
+                if header is None:
+                    return None
+
+                sort_indices = tuple(header.index(x) for x in sort_criteria)
+                id_indices = sort_indices[:-1]
+                get_ids = operator.itemgetter(*id_indices)
+                timestamp_index = sort_indices[-1]
+                sort_key = operator.itemgetter(*sort_indices)
+                metrics = namedtuple('Metrics', header)
+                calc_indices = self.get_calc_indices(header, calcs)
+
+                with io.open(output_filename, open_mode, **kwargs) as csv_file:
+                    writer = csv.writer(csv_file, delimiter=',')
+                    writer.writerow(header + [col_to_add for _, col_to_add, _, _ in calcs])
+                    records_written = 1
+
+                    # As the columns to append are calculated comparing values from previous row and since first
+                    # row has no values to compare default value is set to 0.
+                    no_values = [0.0] * len(calcs)
+                    values = [0] * len(calcs)
+                    previous_key = None
+                    t0 = None
+                    for row in file_reader:
+                        row = convert_record(row)
+                        key = sort_key(row)
+                        t1 = self.make_record(metrics, row, timestamp_index)
+                        if t0 is not None:
+                            if key < previous_key:
+                                # The file is not sorted, the partial output is removed below and the sorting path
+                                # writes the output file again.
+                                records_written = None
+                                break
+                            values = self.calculate_values(t0, t1, calc_indices, get_ids, no_values)
+
+                        row.extend(values)
+                        writer.writerow(row)
+                        records_written += 1
+                        previous_key = key
+                        t0 = t1
+
+        except (IndexError, TypeError, ValueError, IOError):
+            # The sorting path reports the error.
+            records_written = None
+
+        # Never leave a partial output file behind when the file could not be streamed.
+        if records_written is None and os.path.exists(output_filename):
+            os.remove(output_filename)
+
+        return records_written
 
-        # Comparison between two consecutive records is required to calculate required value.
-        # Calculation starts from the second record in the file as first record is a header row hence it is ignored.
-        calculated_value = [func_name(time0, time1, header, compare_indices, col_numerator, col_denominator)
-                            for time0, time1 in zip(metric_file_data[1:], metric_file_data[2:])]
-        # calculated_value = list()
-        # for time0, time1 in zip(metric_file_data[1:], metric_file_data[2:]):
-        #     t0 = header(*time0)
-        #     t1 = header(*time1)
-        #     if t0.timestamp != t1.timestamp and t0[column_index_id] == t1[column_index_id]:
-        #         calculated_value.append(func_name(time0, time1, header, column_index_id))
+    @staticmethod
+    def get_calc_indices(header, calcs):
+        """
+        Resolve the numerator and denominator columns of the calculations to record indices once for the whole file,
+        rather than looking up the attribute by name for every pair of records.
 
-        # Value header is appended for each row and appended at the end. Header row is updated as well for total MB.
-        data_with_calculated_value = append_column_value(metric_file_data, calculated_value, col_to_add)
+        Args:
+            header (list[]): The header row of the metrics file.
+            calcs (list[]): Tuples of (function name, column to add, numerator column, denominator column) to calculate.
 
-        return data_with_calculated_value
+        Returns:
+            A list of (function name, numerator index, denominator index). A column that is not in the file has no
+            index.
+        """""
+        return [(func_name,
+                 header.index(col_numerator) if col_numerator in header else None,
+                 header.index(col_denominator) if col_denominator in header else None)
+                for func_name, _, col_numerator, col_denominator in calcs]
 
     @staticmethod
-    def calculate_avg_latency(time0, time1, header, compare_indices, unused1, unused2):
+    def calculate_values(t0, t1, calc_indices, get_ids, no_values):
         """
-        Calculate the average latency between two consecutive records.
+        Calculate the values of all the functions between two consecutive records. The id and timestamp are compared
+        once for the pair of records.
 
         Args:
-            time0 (list[]): Previous record
-            time1 (list[]): Current Record
-            header (namedtuple): Header row to create namedtuple object.
-            compare_indices (list[]): indices of the record id label to use for comparison purposes.
-            unused1 (str): Not used in this method - is a place holder for col_header in calculate_avg_rate
-            unused2 (str): Not used in this method - is a place holder for rate_header in calculate_avg_rate
+            t0 (namedtuple): Previous record
+            t1 (namedtuple): Current Record
+            calc_indices (list[]): Tuples of (function name, numerator index, denominator index).
+            get_ids (operator.itemgetter): Returns the record id labels to use for comparison purposes.
+            no_values (list[]): The values to use when the records do not belong to the same id or have the same
+                timestamp.
+
+        Returns:
+            A list of calculated values.
+        """""
+        if t0.timestamp != t1.timestamp and get_ids(t0) == get_ids(t1):
+            return [func_name(t0, t1, num_idx, den_idx) for func_name, num_idx, den_idx in calc_indices]
+
+        return no_values
+
+    def make_record(self, metrics, row, timestamp_index):
+        """
+        Convert a row of the metrics file to a record for the rate calculations. The timestamp of the record is stored
+        as seconds since the epoch, so the time between two records is a plain subtraction.
+        The id values of the row are already interned when the row is converted, see RECORD_CONVERSIONS.
+
+        Args:
+            metrics (namedtuple): The namedtuple class for the records of the metrics file.
+            row (list[]): A row of the metrics file, converted to its appropriate data type values.
+            timestamp_index (int): Index of the timestamp column.
+
+        Returns:
+            namedtuple record
+        """""
+        values = list(row)
+        values[timestamp_index] = self.datetime_to_seconds(values[timestamp_index])
+        return metrics._make(values)
+
+    @staticmethod
+    def calculate_avg_latency(t0, t1, unused1, unused2):
+        """
+        Calculate the average latency between two consecutive records of the same id.
+
+        Args:
+            t0 (namedtuple): Previous record
+            t1 (namedtuple): Current Record
+            unused1 (int): Not used in this method - is a place holder for num_idx in calculate_avg_rate
+            unused2 (int): Not used in this method - is a place holder for den_idx in calculate_avg_rate
 
         Returns:
             average latency value.
@@ -256,37 +593,27 @@ class HumanizeFiveSecMetrics(Humanize):
         del unused1
         del unused2
 
-        t0 = header(*time0)
-        t1 = header(*time1)
-
-        # Perform calculation only if two consecutive records have different timestamp values and the same id value.
-        # Return 0 if otherwise.
-        # The compare_indices contains one or more id values and the last is the index to the timestamp.
-        same_id = map(lambda index: t0[index] == t1[index], list(compare_indices)[:-1])
-        if t0.timestamp != t1.timestamp and all(same_id):
-            try:
-                read_ios_diff = t1.read_ios - t0.read_ios
-                write_ios_diff = t1.write_ios - t0.write_ios
-                ios_diff = read_ios_diff + write_ios_diff
-                if ios_diff != 0:
-                    return ((t1.read_latency - t0.read_latency) + (t1.write_latency - t0.write_latency)) / ios_diff
-            except AttributeError:
-                pass
+        try:
+            read_ios_diff = t1.read_ios - t0.read_ios
+            write_ios_diff = t1.write_ios - t0.write_ios
+            ios_diff = read_ios_diff + write_ios_diff
+            if ios_diff != 0:
+                return ((t1.read_latency - t0.read_latency) + (t1.write_latency - t0.write_latency)) / ios_diff
+        except AttributeError:
+            pass
 
         return 0.0
 
     @staticmethod
-    def calculate_avg_io_size(time0, time1, header, compare_indices, unused1, unused2):
+    def calculate_avg_io_size(t0, t1, unused1, unused2):
         """
-        Calculate the average io size between two consecutive records.
+        Calculate the average io size between two consecutive records of the same id.
 
         Args:
-            time0 (list[]): Previous record
-            time1 (list[]): Current Record
-            header (namedtuple): Header row to create namedtuple object.
-            compare_indices (list[]): indices of the record id label to use for comparison purposes.
-            unused1 (str): Not used in this method - is a place holder for col_header in calculate_avg_rate
-            unused2 (str): Not used in this method - is a place holder for rate_header in calculate_avg_rate
+            t0 (namedtuple): Previous record
+            t1 (namedtuple): Current Record
+            unused1 (int): Not used in this method - is a place holder for num_idx in calculate_avg_rate
+            unused2 (int): Not used in this method - is a place holder for den_idx in calculate_avg_rate
 
         Returns:
             average io size value.
@@ -294,37 +621,27 @@ class HumanizeFiveSecMetrics(Humanize):
         del unused1
         del unused2
 
-        t0 = header(*time0)
-        t1 = header(*time1)
-
-        # Perform calculation only if two consecutive records have different timestamp values and the same id value.
-        # Return 0 if otherwise.
-        # The compare_indices contains one or more id values and the last is the index to the timestamp.
-        same_id = map(lambda index: t0[index] == t1[index], list(compare_indices)[:-1])
-        if t0.timestamp != t1.timestamp and all(same_id):
-            try:
-                read_ios_diff = t1.read_ios - t0.read_ios
-                write_ios_diff = t1.write_ios - t0.write_ios
-                ios_diff = read_ios_diff + write_ios_diff
-                if ios_diff != 0:
-                    return ((t1.read_bytes - t0.read_bytes) + (t1.write_bytes - t0.write_bytes)) / ios_diff
-            except AttributeError:
-                pass
+        try:
+            read_ios_diff = t1.read_ios - t0.read_ios
+            write_ios_diff = t1.write_ios - t0.write_ios
+            ios_diff = read_ios_diff + write_ios_diff
+            if ios_diff != 0:
+                return ((t1.read_bytes - t0.read_bytes) + (t1.write_bytes - t0.write_bytes)) / ios_diff
+        except AttributeError:
+            pass
 
         return 0.0
 
     @staticmethod
-    def calculate_total_iops(time0, time1, header, compare_indices, unused1, unused2):
+    def calculate_total_iops(t0, t1, unused1, unused2):
         """
-        Calculate the total iops between two consecutive records.
+        Calculate the total iops between two consecutive records of the same id.
 
         Args:
-            time0 (list[]): Previous record
-            time1 (list[]): Current Record
-            header (namedtuple): Header row to create namedtuple object.
-            compare_indices (list[]): indices of the record id label to use for comparison purposes.
-            unused1 (str): Not used in this method - is a place holder for col_header in calculate_avg_rate
-            unused2 (str): Not used in this method - is a place holder for rate_header in calculate_avg_rate
+            t0 (namedtuple): Previous record
+            t1 (namedtuple): Current Record
+            unused1 (int): Not used in this method - is a place holder for num_idx in calculate_avg_rate
+            unused2 (int): Not used in this method - is a place holder for den_idx in calculate_avg_rate
 
         Returns:
             total iops value.
@@ -332,35 +649,25 @@ class HumanizeFiveSecMetrics(Humanize):
         del unused1
         del unused2
 
-        t0 = header(*time0)
-        t1 = header(*time1)
-
-        # Perform calculation only if two consecutive records have different timestamp values and the same id value.
-        # Return 0 if otherwise.
-        # The compare_indices contains one or more id values and the last is the index to the timestamp.
-        same_id = map(lambda index: t0[index] == t1[index], list(compare_indices)[:-1])
-        if t0.timestamp != t1.timestamp and all(same_id):
-            try:
-                time_diff = (t1.timestamp - t0.timestamp).total_seconds()
-                if time_diff != 0:
-                    return ((t1.read_ios - t0.read_ios) + (t1.write_ios - t0.write_ios)) / time_diff
-            except AttributeError:
-                pass
+        try:
+            time_diff = t1.timestamp - t0.timestamp
+            if time_diff != 0:
+                return ((t1.read_ios - t0.read_ios) + (t1.write_ios - t0.write_ios)) / time_diff
+        except AttributeError:
+            pass
 
         return 0.0
 
     @staticmethod
-    def calculate_total_bandwidth(time0, time1, header, compare_indices, unused1, unused2):
+    def calculate_total_bandwidth(t0, t1, unused1, unused2):
         """
-        Calculate the total bandwidth between two consecutive records.
+        Calculate the total bandwidth between two consecutive records of the same id.
 
         Args:
-            time0 (list[]): Previous record
-            time1 (list[]): Current Record
-            header (namedtuple): Header row to create namedtuple object.
-            compare_indices (list[]): indices of the record id label to use for comparison purposes.
-            unused1 (str): Not used in this method - is a place holder for col_header in calculate_avg_rate
-            unused2 (str): Not used in this method - is a place holder for rate_header in calculate_avg_rate
+            t0 (namedtuple): Previous record
+            t1 (namedtuple): Current Record
+            unused1 (int): Not used in this method - is a place holder for num_idx in calculate_avg_rate
+            unused2 (int): Not used in this method - is a place holder for den_idx in calculate_avg_rate
 
         Returns:
             total bandwidth value or 0 if records don't have matching id values.
@@ -368,33 +675,24 @@ class HumanizeFiveSecMetrics(Humanize):
         del unused1
         del unused2
 
-        t0 = header(*time0)
-        t1 = header(*time1)
-
-        # Perform calculation only if two consecutive records have different timestamp values and the same id value.
-        # The compare_indices contains one or more id values and the last is the index to the timestamp.
-        same_id = map(lambda index: t0[index] == t1[index], list(compare_indices)[:-1])
-        if t0.timestamp != t1.timestamp and all(same_id):
-            try:
-                time_diff = (t1.timestamp - t0.timestamp).total_seconds()
-                if time_diff != 0:
-                    return ((t1.read_bytes - t0.read_bytes) + (t1.write_bytes - t0.write_bytes)) / time_diff
-            except AttributeError:
-                pass
+        try:
+            time_diff = t1.timestamp - t0.timestamp
+            if time_diff != 0:
+                return ((t1.read_bytes - t0.read_bytes) + (t1.write_bytes - t0.write_bytes)) / time_diff
+        except AttributeError:
+            pass
         return 0.0
 
     @staticmethod
-    def calculate_io_workload_util(time0, time1, header, compare_indices, unused1, unused2):
+    def calculate_io_workload_util(t0, t1, unused1, unused2):
         """
-        Calculate the io workload CPU utilization between two consecutive records.
+        Calculate the io workload CPU utilization between two consecutive records of the same id.
 
         Args:
-            time0 (list[]): Previous record
-            time1 (list[]): Current Record
-            header (namedtuple): Header row to create namedtuple object.
-            compare_indices (list[]): indices of the record id label to use for comparison purposes.
-            unused1 (str): Not used in this method - is a place holder for col_header in calculate_avg_rate
-            unused2 (str): Not used in this method - is a place holder for reate_header in calculate_avg_rate
+            t0 (namedtuple): Previous record
+            t1 (namedtuple): Current Record
+            unused1 (int): Not used in this method - is a place holder for num_idx in calculate_avg_rate
+            unused2 (int): Not used in this method - is a place holder for den_idx in calculate_avg_rate
 
         Returns:
             io workload CPU utilization value.
@@ -402,24 +700,16 @@ class HumanizeFiveSecMetrics(Humanize):
         del unused1
         del unused2
 
-        t0 = header(*time0)
-        t1 = header(*time1)
-
-        # Perform calculation only if two consecutive records have different timestamp values and the same id value.
-        # Return 0 if otherwise.
-        # The compare_indices contains one or more id values and the last is the index to the timestamp.
-        same_id = map(lambda index: t0[index] == t1[index], list(compare_indices)[:-1])
-        if t0.timestamp != t1.timestamp and all(same_id):
-            try:
-                total_ticks = t1.total_ticks - t0.total_ticks
-                if total_ticks != 0:
-                    return (total_ticks - (t1.idle_ticks - t0.idle_ticks)) / total_ticks
-            except AttributeError:
-                pass
+        try:
+            total_ticks = t1.total_ticks - t0.total_ticks
+            if total_ticks != 0:
+                return (total_ticks - (t1.idle_ticks - t0.idle_ticks)) / total_ticks
+        except AttributeError:
+            pass
         return 0.0
 
     @staticmethod
-    def calculate_avg_rate(time0, time1, header, compare_indices, col_header, rate_header):
+    def calculate_avg_rate(t0, t1, num_idx, den_idx):
         """
         Formulas for the calculations can be found at:
         https://confluence.cec.lab.emc.com/pages/viewpage.action?spaceKey=CYCLONE&title=TRIF-592+Counters+to+rates
@@ -435,346 +725,185 @@ class HumanizeFiveSecMetrics(Humanize):
                     col_header = read_bytes
                     rate_header = timestamp
         Args:
-            time0 (list[]): Previous record
-            time1 (list[]): Current Record
-            header (namedtuple): Header row to create namedtuple object.
-            compare_indices (list[]): indices of the record id label to use for comparison purposes.
-            col_header (str): name of the column header to use to perform the rate calculation.
-            rate_header (str): name of the column header used as the average value in the rate calculation.
+            t0 (namedtuple): Previous record
+            t1 (namedtuple): Current Record
+            num_idx (int): index of the col_header column used to perform the rate calculation, or None.
+            den_idx (int): index of the rate_header column used as the average value in the rate calculation, or None.
 
         Returns:
             total bandwidth value or 0 if records don't have matching id values.
         """""
-        t0 = header(*time0)
-        t1 = header(*time1)
-
-        # Perform calculation only if two consecutive records have different timestamp values and the same id value.
-        # The compare_indices contains one or more id values and the last is the index to the timestamp.
-        same_id = map(lambda index: t0[index] == t1[index], list(compare_indices)[:-1])
-        if t0.timestamp != t1.timestamp and all(same_id):
-            try:
-                rate_diff = getattr(t1, rate_header) - getattr(t0, rate_header)
-
-                # If the rate header is a timestamp, convert the difference into seconds.
-                if rate_header == 'timestamp':
-                    rate_diff = rate_diff.total_seconds()
+        # A rate column that is not in the file has no index, and no value to calculate.
+        if num_idx is None or den_idx is None:
+            return 0.0
 
-                if rate_diff != 0:
-                    return (getattr(t1, col_header) - getattr(t0, col_header)) / rate_diff
+        # If the rate header is a timestamp, the difference is in seconds.
+        rate_diff = t1[den_idx] - t0[den_idx]
+        if rate_diff != 0:
+            return (t1[num_idx] - t0[num_idx]) / rate_diff
 
-            except AttributeError:
-                pass
         return 0.0
 
     @staticmethod
-    def str_to_datetime(str_time):
+    def datetime_to_seconds(timestamp):
         """
-        Convert a string representation of the datetime to an actual datetime object
+        Convert a datetime object to the number of seconds since the epoch.
 
         Args:
-            str_time (str): A string representation of time including timezone information
-                Example: str_time = '2020-11-01 20:44:15+00:00'
+            timestamp (datetime): A naive UTC datetime, as returned by str_to_datetime.
 
         Returns:
-            datetime object
+            float seconds
         """""
-        return datetime.strptime(str_time[:19], '%Y-%m-%d %H:%M:%S') + \
-            timedelta(hours=int(str_time[20:22]), minutes=int(str_time[23:])) * (-1 if str_time[19] == '+' else 1)
+        return (timestamp - EPOCH).total_seconds()
 
-    def appliance_record(self, appliance_id, timestamp, read_latency, write_latency, read_ios, write_ios,
-                         read_bytes, write_bytes, mirror_write_ios, mirror_write_latency, mirror_overhead_latency,
-                         mirror_write_bytes, idle_ticks, total_ticks):
+    def str_to_datetime(self, str_time):
         """
-        Convert the appliance record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str, str, str, str, str) ->
-              (str, datetime, int, int, int, int, int, int, int, int, int, int, int, int)
+        Convert a string representation of the datetime to an actual datetime object.
+        The samples of all objects in a collection share the same timestamps, so every parsed timestamp is cached and
+        the string is only parsed the first time it is seen.
 
-        Return:
-            list of values
-        """""
-        return [appliance_id, self.str_to_datetime(timestamp), int(read_latency), int(write_latency),
-                int(read_ios), int(write_ios), int(read_bytes), int(write_bytes), int(mirror_write_ios),
-                int(mirror_write_latency), int(mirror_overhead_latency), int(mirror_write_bytes),
-                int(idle_ticks), int(total_ticks)]
-
-    def cluster_record(self, timestamp, cluster_id, read_latency, write_latency, read_ios, write_ios,
-                       read_bytes, write_bytes, mirror_write_ios, mirror_write_latency, mirror_overhead_latency,
-                       mirror_write_bytes, idle_ticks, total_ticks):
-        """
-        Convert the cluster record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str, str, str, str, str) ->
-              (datetime, str, int, int, int, int, int, int, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [self.str_to_datetime(timestamp), cluster_id, int(read_latency), int(write_latency),
-                int(read_ios), int(write_ios), int(read_bytes), int(write_bytes), int(mirror_write_ios),
-                int(mirror_write_latency), int(mirror_overhead_latency), int(mirror_write_bytes),
-                int(idle_ticks), int(total_ticks)]
-
-    def node_record(self, node_id, appliance_id, timestamp, read_latency, write_latency, read_ios, write_ios,
-                    read_bytes, write_bytes, mirror_write_ios, mirror_write_latency, mirror_overhead_latency,
-                    mirror_write_bytes, idle_ticks, total_ticks):
-        """
-        Convert the node record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str, str, str, str, str, str) ->
-              (str, str, datetime, int, int, int, int, int, int, float, float, float, float, int, int)
-
-        Return:
-            list of values
-        """""
-        return [node_id, appliance_id, self.str_to_datetime(timestamp), int(read_latency), int(write_latency),
-                int(read_ios), int(write_ios), int(read_bytes), int(write_bytes),  float(mirror_write_ios),
-                float(mirror_write_latency), float(mirror_overhead_latency), float(mirror_write_bytes),
-                int(idle_ticks), int(total_ticks)]
-
-    def initiator_record(self, initiator_id, timestamp, read_latency, write_latency, read_ios, write_ios,
-                         read_bytes, write_bytes):
-        """
-        Convert the initiator record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str) -> (str, datetime, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [initiator_id, self.str_to_datetime(timestamp), int(read_latency), int(write_latency),
-                int(read_ios), int(write_ios), int(read_bytes), int(write_bytes)]
-
-    def fe_fc_port_record(self, node_id, appliance_id, fe_port_id, timestamp, read_latency, write_latency,
-                          read_ios, write_ios, read_bytes, write_bytes, total_logins, dumped_frames,
-                          loss_of_signal_count, invalid_crc_count, loss_of_sync_count, invalid_tx_word_count,
-                          prim_seq_prot_err_count, link_failure_count):
-        """
-        Convert the fe fc port record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str, str, str, str, str, str, str, str, str) ->
-              (str, str, str, datetime, int, int, int, int, int, int, int, int, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [node_id, appliance_id, fe_port_id, self.str_to_datetime(timestamp), int(read_latency),
-                int(write_latency), int(read_ios), int(write_ios), int(read_bytes), int(write_bytes),
-                int(total_logins),
-                int(dumped_frames), int(loss_of_signal_count), int(invalid_crc_count), int(loss_of_sync_count),
-                int(invalid_tx_word_count), int(prim_seq_prot_err_count), int(link_failure_count)]
-
-    def fe_fc_node_record(self, node_id, appliance_id, timestamp, read_latency, write_latency, read_ios, write_ios,
-                          read_bytes, write_bytes, total_logins, dumped_frames, loss_of_signal_count,
-                          invalid_crc_count, loss_of_sync_count, invalid_tx_word_count, prim_seq_prot_err_count,
-                          link_failure_count):
-        """
-        Convert the fe fc node record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str, str, str, str, str, str, str, str) ->
-              (str, str, datetime, int, int, int, int, int, int, int, int, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [node_id, appliance_id, self.str_to_datetime(timestamp), int(read_latency), int(write_latency),
-                int(read_ios), int(write_ios), int(read_bytes), int(write_bytes), int(total_logins),
-                int(dumped_frames), int(loss_of_signal_count), int(invalid_crc_count), int(loss_of_sync_count),
-                int(invalid_tx_word_count), int(prim_seq_prot_err_count), int(link_failure_count)]
-
-    def fe_eth_port_record(self, fe_port_id, node_id, appliance_id, timestamp, pkt_rx, pkt_tx, bytes_tx, bytes_rx,
-                           pkt_rx_no_buffer_error, pkt_rx_crc_error, pkt_tx_error):
-        """
-        Convert the fe eth port record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str, str) ->
-              (str, str, str, datetime, int, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [fe_port_id, node_id, appliance_id, self.str_to_datetime(timestamp), int(pkt_rx), int(pkt_tx),
-                int(bytes_tx), int(bytes_rx), int(pkt_rx_no_buffer_error), int(pkt_rx_crc_error), int(pkt_tx_error)]
-
-    def fe_eth_node_record(self, node_id, appliance_id, timestamp, pkt_rx, pkt_tx, bytes_tx, bytes_rx,
-                           pkt_rx_no_buffer_error, pkt_rx_crc_error, pkt_tx_error):
-        """
-        Convert the fe eth node record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str) ->
-              (str, str, datetime, int, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [node_id, appliance_id, self.str_to_datetime(timestamp), int(pkt_rx), int(pkt_tx),
-                int(bytes_tx), int(bytes_rx), int(pkt_rx_no_buffer_error), int(pkt_rx_crc_error), int(pkt_tx_error)]
-
-    def drive_record(self, timestamp, appliance_id, node_id, drive_id, read_latency, write_latency,
-                     read_ios, write_ios, read_bytes, write_bytes, queue_len, state):
-        """
-        Convert the drive record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str) ->
-              (datetime, str, str, str, int, int, int, int, int, int, int, str)
-
-        Return:
-            list of values
-        """""
-        return [self.str_to_datetime(timestamp), appliance_id, node_id, drive_id, int(read_latency),
-                int(write_latency), int(read_ios), int(write_ios), int(read_bytes), int(write_bytes),
-                int(queue_len), state]
-
-    def cache_record(self, timestamp, appliance_id, cache_type, node_id, pages_local, pages_peer, total_bytes,
-                     dirty_pages_local, dirty_pages_peer, total_dirty_bytes, pages_being_held, flush_page_merges,
-                     waits_for_pages, fast_page_lookups, access_lookups, cache_lookups, cache_fast_lookups,
-                     flush_requests, pages_holds, page_holds_rolledback, pages_flushed, load_during_holds, flush_zeros,
-                     flush_completes, forced_flushes, locked_retried, fua_locked_retried, free_pages,
-                     cpydff_tail_wait_current, cpydff_tail_wait_highwtr, cpydff_num_of_timeouts,
-                     cpydff_largest_tail_lsn, cpydff_num_of_flushes, suspended, suspend_calls, resume_calls,
-                     unaligned_ios, drive_reads, page_overwrites, page_read_hits, page_read_misses,
-                     page_read_invalid_found, page_write_invalid_found, page_writes_all, page_write_misses,
-                     page_write_hits, page_write_hits_dirty, page_read_pure_hits, page_read_hit_locks,
-                     page_read_log_loads, page_read_mapper_loads, page_scan_invalidates, ext_rec_scan_requeues,
-                     ext_rec_scan_completed, ext_rec_aborted, max_ext_rec_scan_time, ext_page_scan_evaluated,
-                     ontk_pgclns_tlmv, ontk_pgclns_cpblow, ontk_pgclns_ondmnd, ontk_pgclns_cachethtl,
-                     offtk_pgclns_tlmv, offtk_pgclns_cpblow, offtk_pgclns_ondmnd, offtk_pgclns_cachethtl,
-                     cpb_getbuf_zeroes, skipped_pgclns_bthnodes, clean_reschedules, ios_started, ios_completed,
-                     ios_active, log_full_waits, cache_full_waits, cpydff_total_requests, cpydff_total_tail_waits,
-                     peerpdb_failed_tryget_retry, hold_try_access_failure):
-        """
-        Convert the cache record values from string back to its appropriate data types.
-
-        Return:
-            list of values
-        """""
-        return [self.str_to_datetime(timestamp), appliance_id, cache_type, node_id, int(pages_local), int(pages_peer),
-                int(total_bytes), int(dirty_pages_local), int(dirty_pages_peer), int(total_dirty_bytes),
-                int(pages_being_held), int(flush_page_merges), int(waits_for_pages), int(fast_page_lookups),
-                int(access_lookups), int(cache_lookups), int(cache_fast_lookups), int(flush_requests),
-                int(pages_holds) if pages_holds else 0, int(page_holds_rolledback), int(pages_flushed),
-                int(load_during_holds), int(flush_zeros), int(flush_completes), int(forced_flushes),
-                int(locked_retried), int(fua_locked_retried), int(free_pages), int(cpydff_tail_wait_current),
-                int(cpydff_tail_wait_highwtr), int(cpydff_num_of_timeouts), int(cpydff_largest_tail_lsn),
-                int(cpydff_num_of_flushes), int(suspended), int(suspend_calls), int(resume_calls), int(unaligned_ios),
-                int(drive_reads), int(page_overwrites), int(page_read_hits), int(page_read_misses),
-                int(page_read_invalid_found), int(page_write_invalid_found), int(page_writes_all),
-                int(page_write_misses), int(page_write_hits), int(page_write_hits_dirty), int(page_read_pure_hits),
-                int(page_read_hit_locks), int(page_read_log_loads), int(page_read_mapper_loads),
-                int(page_scan_invalidates), int(ext_rec_scan_requeues), int(ext_rec_scan_completed),
-                int(ext_rec_aborted), int(max_ext_rec_scan_time), int(ext_page_scan_evaluated), int(ontk_pgclns_tlmv),
-                int(ontk_pgclns_cpblow), int(ontk_pgclns_ondmnd), int(ontk_pgclns_cachethtl), int(offtk_pgclns_tlmv),
-                int(offtk_pgclns_cpblow), int(offtk_pgclns_ondmnd), int(offtk_pgclns_cachethtl),
-                int(cpb_getbuf_zeroes), int(skipped_pgclns_bthnodes), int(clean_reschedules), int(ios_started),
-                int(ios_completed), int(ios_active), int(log_full_waits), int(cache_full_waits),
-                int(cpydff_total_requests), int(cpydff_total_tail_waits), int(peerpdb_failed_tryget_retry),
-                int(hold_try_access_failure)]
-
-    def host_record(self, host_id, timestamp, read_latency, write_latency, read_ios, write_ios, read_bytes,
-                    write_bytes):
-        """
-        Convert the host record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str) -> (str, datetime, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [host_id, self.str_to_datetime(timestamp), int(read_latency), int(write_latency),
-                int(read_ios), int(write_ios), int(read_bytes), int(write_bytes)]
-
-    def host_group_record(self, hg_id, timestamp, read_latency, write_latency, read_ios, write_ios, read_bytes,
-                          write_bytes):
-        """
-        Convert the host group record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str) -> (str, datetime, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [hg_id, self.str_to_datetime(timestamp), int(read_latency), int(write_latency),
-                int(read_ios), int(write_ios), int(read_bytes), int(write_bytes)]
-
-    def volume_record(self, volume_id, timestamp, current_appliance_id, appliance_id, read_latency, write_latency,
-                      read_ios, write_ios, read_bytes, write_bytes, mirror_write_ios, mirror_overhead_latency,
-                      mirror_write_bytes):
-        """
-        Convert the volume record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str, str, str, str) ->
-              (str, datetime, str, str, int, int, int, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [volume_id, self.str_to_datetime(timestamp), current_appliance_id, appliance_id, int(read_latency),
-                int(write_latency), int(read_ios), int(write_ios), int(read_bytes), int(write_bytes),
-                int(mirror_write_ios), int(mirror_overhead_latency), int(mirror_write_bytes)]
-
-    def vg_record(self, vg_id, current_appliance_id, appliance_id, timestamp, read_latency, write_latency,
-                  read_ios, write_ios, read_bytes, write_bytes):
-        """
-        Convert the volume group record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str, str) ->
-              (str, str, str, datetime, int, int, int, int, int, int)
-
-        Return:
-            list of values
-        """""
-        return [vg_id, current_appliance_id, appliance_id, self.str_to_datetime(timestamp), int(read_latency),
-                int(write_latency), int(read_ios), int(write_ios), int(read_bytes), int(write_bytes)]
-
-    def vm_record(self, vm_id, timestamp, read_latency, write_latency, read_ios, write_ios, read_bytes, write_bytes):
-        """
-        Convert the virtual machine record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str) -> (str, datetime, int, int, int, int, int, int)
+        Args:
+            str_time (str): A string representation of time including timezone information
+                Example: str_time = '2020-11-01 20:44:15+00:00'
 
-        Return:
-            list of values
+        Returns:
+            datetime object
         """""
-        return [vm_id, self.str_to_datetime(timestamp), int(read_latency), int(write_latency),
-                int(read_ios), int(write_ios), int(read_bytes), int(write_bytes)]
-
-    def ip_port_record(self, ip_port_id, appliance_id, timestamp, read_latency, write_latency, read_ios, write_ios,
-                       read_bytes, write_bytes):
+        # A file with a single object, like the cluster file, has a new timestamp on every row. Looking the timestamp
+        # up with get keeps a miss as cheap as a hit, where a KeyError would be raised and caught for every row.
+        timestamp = self.timestamp_cache.get(str_time)
+        if timestamp is not None:
+            return timestamp
+
+        if ciso8601 is not None:
+            # Drop the timezone the same way as the fallback path, the result is a naive UTC datetime without
+            # microseconds. A timestamp without a timezone is rejected like the fallback rejects it.
+            timestamp = ciso8601.parse_datetime(str_time)
+            offset = timestamp.utcoffset()
+            if offset is None:
+                raise ValueError('Timestamp {} has no timezone'.format(str_time))
+
+            timestamp = timestamp.replace(tzinfo=None, microsecond=0) - offset
+        else:
+            # The timezone offset is always the last six characters, '+HH:MM' or '-HH:MM'. The seconds can have a
+            # fraction, 'YYYY-MM-DD HH:MM:SS.ffffff+HH:MM', which is dropped. Any other length is rejected, so the
+            # digits of a fraction are never read as the offset.
+            length = len(str_time)
+            if (length != 25 and (length < 27 or length > 32 or str_time[19] != '.' or not str_time[20:-6].isdigit())) \
+                    or str_time[-6] not in '+-' or str_time[-3] != ':':
+                raise ValueError('Timestamp {} does not match the format YYYY-MM-DD HH:MM:SS+HH:MM'.format(str_time))
+
+            # The timestamps are always written as 'YYYY-MM-DD HH:MM:SS+HH:MM', so the fields are sliced from their
+            # fixed positions instead of being matched against a format by strptime. The separators and digits are
+            # checked first, as strptime checks them, so a timestamp in another format is still rejected.
+            digits = (str_time[0:4] + str_time[5:7] + str_time[8:10] + str_time[11:13] + str_time[14:16] +
+                      str_time[17:19] + str_time[-5:-3] + str_time[-2:])
+            if str_time[4] != '-' or str_time[7] != '-' or str_time[10] != ' ' or str_time[13] != ':' \
+                    or str_time[16] != ':' or not digits.isdigit():
+                raise ValueError('Timestamp {} does not match the format YYYY-MM-DD HH:MM:SS+HH:MM'.format(str_time))
+
+            # A '+' offset is ahead of UTC, so it is subtracted to get the UTC time.
+            sign = -1 if str_time[-6] == '+' else 1
+            offset_seconds = sign * (int(str_time[-5:-3]) * 3600 + int(str_time[-2:]) * 60)
+
+            timestamp = datetime(int(str_time[0:4]), int(str_time[5:7]), int(str_time[8:10]), int(str_time[11:13]),
+                                 int(str_time[14:16]), int(str_time[17:19])) + timedelta(seconds=offset_seconds)
+
+        # Bound the memory used by the cache for very long collections.
+        if len(self.timestamp_cache) >= TIMESTAMP_CACHE_SIZE:
+            self.timestamp_cache.clear()
+
+        self.timestamp_cache[str_time] = timestamp
+        return timestamp
+
+    def get_record_converter(self, translate_func):
         """
-        Convert the virtual machine record values from string back to its appropriate data types.
+        Generate a function that converts a csv row the same way as one of the *_record methods. The conversions of
+        the schema of the record are compiled into a function of the row, so the row is converted without unpacking it
+        into a method call. A method without a schema is called as is.
 
-        type: (str, str, str, str, str, str, str, str, str) -> (str, str, datetime, int, int, int, int, int, int)
+        Args:
+            translate_func: A *_record method that converts the csv elements back to their appropriate datatype values.
 
-        Return:
-            list of values
+        Returns:
+            A function taking the csv row as a list and returning a list of values.
         """""
-        return [ip_port_id, appliance_id, self.str_to_datetime(timestamp), int(read_latency), int(write_latency),
-                int(read_ios), int(write_ios), int(read_bytes), int(write_bytes)]
-
-    def sdnas_nfs_record(self, node_id, appliance_id, timestamp, read_ios, write_ios, read_latency, write_latency,
-                         read_bytes, write_bytes):
-        """
-        Convert the sdnas_nfs_by_node_five_sec record values from string back to its appropriate data types.
-
-        type: (str, str, str, str, str, str, str, str, str) -> (str, str, datetime, int, int, int, int, int, int)
+        schema = RECORD_SCHEMAS.get(translate_func.__name__)
+        if schema is None:
+            return lambda row: translate_func(*row)
+
+        # The str_to_datetime method is bound once and called as a plain name.
+        values = ['row[{}]'.format(index) for index in range(len(schema))]
+        source = 'def convert(row):\n    return [{}]\n'.format(record_values_source(schema, values, ''))
+        namespace = dict(str_to_datetime=self.str_to_datetime, intern=intern)
+        exec(compile(source, '<{}>'.format(translate_func.__name__), 'exec'), namespace)
+        return namespace['convert']
+
+
+def convert_metric_file(arguments):
+    """
+    Convert a single metric file to rate values. This is a module level function so it can be run by a worker
+    process of a multiprocessing pool.
+
+    Args:
+        arguments (tuple): The HumanizeFiveSecMetrics instance followed by the arguments of convert_metrics_to_rates.
+
+    Returns:
+        records_written: Records written in metric file.
+    """""
+    five_sec_metrics = arguments[0]
+    return five_sec_metrics.convert_metrics_to_rates(*arguments[1:])
+
+
+def record_values_source(schema, values, owner):
+    """
+    Create the source of the list of converted values for a record schema.
+
+    Args:
+        schema (tuple): The (column name, data type) pairs of the record.
+        values ([str]): The source of the csv value of each column.
+        owner (str): The source prefix of the str_to_datetime method, like 'self.'.
+
+    Returns:
+        The comma separated source of the converted values.
+    """""
+    return ', '.join(RECORD_CONVERSIONS[data_type].format(value, owner)
+                     for (_, data_type), value in zip(schema, values))
+
+
+def make_record_method(name, schema):
+    """
+    Generate a *_record method that converts the csv values of a record from string back to their appropriate data
+    types. The arguments of the method are the columns of the schema.
+
+    Args:
+        name (str): Name of the method.
+        schema (tuple): The (column name, data type) pairs of the record.
+
+    Returns:
+        The method function.
+    """""
+    columns = [column for column, _ in schema]
+    source = 'def {}(self, {}):\n    return [{}]\n'.format(name, ', '.join(columns),
+                                                          record_values_source(schema, columns, 'self.'))
+    namespace = dict(intern=intern)
+    exec(compile(source, '<{}>'.format(name), 'exec'), namespace)
+    method = namespace[name]
+    method.__doc__ = """
+        Convert the {} values from string back to its appropriate data types.
+
+        type: ({}) ->
+              ({})
 
         Return:
             list of values
-        """""
-        return [node_id, appliance_id, self.str_to_datetime(timestamp), int(read_ios), int(write_ios),
-                int(read_latency), int(write_latency), int(read_bytes), int(write_bytes)]
-
-    def sdnas_smb_record(self, node_id, appliance_id, timestamp, read_ios, write_ios, read_latency, write_latency,
-                         read_bytes, write_bytes, total_calls, current_tcp_connections):
-        """
-        Convert the sdnas_nfs_by_node_five_sec record values from string back to its appropriate data types.
+        """.format(name.replace('_', ' '), ', '.join('str' for _ in schema),
+                   ', '.join(data_type for _, data_type in schema))
+    method.__qualname__ = 'HumanizeFiveSecMetrics.{}'.format(name)
+    return method
 
-        type: (str, str, str, str, str, str, str, str, str, str, str) ->
-              (str, str, datetime, int, int, int, int, int, int, int, int)
 
-        Return:
-            list of values
-        """""
-        return [node_id, appliance_id, self.str_to_datetime(timestamp), int(read_ios), int(write_ios),
-                int(read_latency), int(write_latency), int(read_bytes), int(write_bytes), int(total_calls),
-                int(current_tcp_connections)]
+# Add the *_record methods generated from the schemas to the class.
+for record_name, record_schema in RECORD_SCHEMAS.items():
+    setattr(HumanizeFiveSecMetrics, record_name, make_record_method(record_name, record_schema))
@@ -23,8 +23,7 @@ from __future__ import print_function
 
 import csv
 import re
-from collections import namedtuple, OrderedDict
-from humanize_base import Humanize, get_full_path_for_file, get_value_from_key, COLUMN_HEADER_NAME
+from humanize_base import Humanize, get_value_from_key, BYTES_CONVERTER, BYTES_PER_MIB, COLUMN_HEADER_NAME
 
 COLUMN_HEADER_INDEX = 'port_index'
 
@@ -36,12 +35,16 @@ class HumanizeEthPort(Humanize):
     # Name of file with virtual eth port details.
     VIRTUAL_ETH_PORT_FILENAME = 'veth_port.csv'
 
-    # Regex to extract fe_port_id from string.
+    # Regex to extract fe_port_id from string, compiled once as it is searched for every row of the veth port file.
     # Eg: '{u'partner_id': u'23c38cd317d542b5bb1be6396ff6362f', u'fe_port_id': u'1776e139b5754be78a96908108001403'}'
-    FE_PORT_ID_REGEX = '(?:u\'fe_port_id\': u\')(.*?)(?:\')'
+    FE_PORT_ID_REGEX = re.compile('u\'fe_port_id\': u\'([^\']*)\'')
+
+    # Port name and speed of a fe eth port id that is in neither the eth port nor the virtual eth port lookup.
+    UNKNOWN_PORT_NAME_AND_SPEED = (None, 'virtual')
 
     fe_eth_port_lookup_dict = dict()
     v_eth_port_lookup_dict = dict()
+    port_name_and_speed_lookup_dict = dict()
 
     def __init__(self, input_directory=None):
         super(HumanizeEthPort, self).__init__(input_directory)
@@ -59,6 +62,14 @@ class HumanizeEthPort(Humanize):
         # Create dictionary with key as virtual port id and value as name.
         self.v_eth_port_lookup_dict = self.create_virtual_port_lookup(virtual_eth_port_csv_files)
 
+        # Create dictionary with key as port id and value as the port name and speed, the speed of a virtual port is
+        # "virtual". A port in the eth port lookup takes precedence over a virtual port with the same id.
+        self.port_name_and_speed_lookup_dict = dict(
+            (port_id, (name, 'virtual')) for port_id, name in self.v_eth_port_lookup_dict.items())
+        self.port_name_and_speed_lookup_dict.update(
+            (port_id, (eth_port.get(COLUMN_HEADER_NAME), eth_port.get('current_speed')))
+            for port_id, eth_port in self.fe_eth_port_lookup_dict.items() if eth_port)
+
     def add_details(self, filename):
         """
         A list is created with all records from fe eth port metrics file. This method adds port name and speed details
@@ -74,72 +85,45 @@ class HumanizeEthPort(Humanize):
             ValueError if metric file to update is not found.
         """""
         if not self.fe_eth_port_lookup_dict and not self.v_eth_port_lookup_dict:
-            return
-
-        input_filename = get_full_path_for_file(self.PROCESSED_METRICS_OUTPUT_DIR, filename)
+            return 0
 
-        # Read data from fe eth port metrics file
+        # Add port name and speed details, in case of virtual port the port speed is virtual, and convert tx and rx per
+        # second values in MB. Every record is written as soon as it is read from the fe eth port metrics file.
         try:
-            fe_eth_file_data = self.read_file_data(input_filename)
+            fe_eth_records = self.stream_file_data(filename, self.make_fe_eth_port_augmenter)
 
         except IOError:
             # Return if file could not be processed.
             print("Could not process file {}".format(filename))
             return 0
 
-        # Add port name and speed details. In case of virtual port and port speed as virtual.
-        data_with_port_speed_details = self.add_port_and_speed_details(fe_eth_file_data, self.fe_eth_port_lookup_dict,
-                                                                       self.v_eth_port_lookup_dict,
-                                                                       ['port', 'speed'])
-
-        # Convert tx and rx per second values in MB
-        file_data_with_tx_rx_details = self.calculate_tx_rx(data_with_port_speed_details)
-
-        # Return the number of records written in metrics file.
-        fe_eth_records = self.write_to_file(filename, file_data_with_tx_rx_details)
-
-        print('Records written in {} are {}'.format(filename, fe_eth_records))
-
         return fe_eth_records
 
-    @staticmethod
-    def add_port_and_speed_details(fe_eth_file_data, fe_eth_port_lookup, v_eth_port_lookup, header_list):
+    def make_fe_eth_port_augmenter(self, header):
         """
-        Adds port and speed details for fe eth port metrics file. If port id is virtual port name is selected from
-        v_eth_port lookup and port speed is marked as "virtual". Append header column values for port name and speed.
+        Extends the header of the fe eth port metrics file with the port, speed, Mbytes_tx_ps and Mbytes_rx_ps columns
+        and returns a function that appends their values to a record.
 
         Args:
-            fe_eth_file_data (list):  List of file data.
-            fe_eth_port_lookup (dict{}): Dictionary for fe eth port.
-            v_eth_port_lookup (dict{}): Dictionary for virtual eth port.
-            header_list (list): List of headers.
+            header (list): Header row of the fe eth port metrics file.
 
         Returns:
-            A list of data with port and speed details.
-
-        Test:
-            test_humanize_base.py::test_add_port_and_speed_details
+            A function that appends the port and tx rx details to a record.
         """""
-        fe_eth_file_data[0].extend(header_list)
-
-        fe_port_id_index = fe_eth_file_data[0].index('fe_port_id')
-
-        # Process every record in the file.
-        for data in fe_eth_file_data[1:]:
-            # Append port name if it exist in fe eth port else lookup for virtual eth port.
-            port_name = fe_eth_port_lookup.get(data[fe_port_id_index]).get(
-                COLUMN_HEADER_NAME) if fe_eth_port_lookup.get(
-                data[fe_port_id_index]) else v_eth_port_lookup.get(data[fe_port_id_index])
+        fe_port_id_index = header.index('fe_port_id')
+        tx_index = header.index('bytes_tx_ps')
+        rx_index = header.index('bytes_rx_ps')
+        header.extend(['port', 'speed', 'Mbytes_tx_ps', 'Mbytes_rx_ps'])
 
-            data.append(port_name)
+        get_port_name_and_speed = self.port_name_and_speed_lookup_dict.get
+        unknown_port_name_and_speed = self.UNKNOWN_PORT_NAME_AND_SPEED
+        _mib = self.convert_to_mib
 
-            # Append current speed if fe eth port else "virtual" for virtual eth port.
-            speed = fe_eth_port_lookup.get(data[fe_port_id_index]).get(
-                'current_speed') if fe_eth_port_lookup.get(
-                data[fe_port_id_index]) else 'virtual'
-            data.append(speed)
+        def augment_record(record):
+            record.extend(get_port_name_and_speed(record[fe_port_id_index], unknown_port_name_and_speed))
+            record.extend([_mib(record[tx_index], 3), _mib(record[rx_index], 3)])
 
-        return fe_eth_file_data
+        return augment_record
 
     def create_virtual_port_lookup(self, csv_file_list):
         """
@@ -160,25 +144,25 @@ class HumanizeEthPort(Humanize):
             test_humanize_base.py::test_create_virtual_port_lookup
         """""
         port_id_name_lookup = dict()
+        search_fe_port_id = self.FE_PORT_ID_REGEX.search
 
         # Process every config file in the list.
         for file_name in csv_file_list:
             try:
                 with open(file_name) as file_handle:
                     reader = csv.reader(file_handle)
-                    data = namedtuple('FileData', next(reader))
+                    header = next(reader)
+                    extra_details_index = header.index('extra_details')
+                    name_index = header.index(COLUMN_HEADER_NAME)
 
                     for row in reader:
-                        file_data = data(*row)
-
                         # Extract column value for extra details column from the config file.
-                        col = file_data.extra_details
+                        col = row[extra_details_index]
 
                         # Extract fe_port_id value in the column to use as key.
-
-                        key = re.search(self.FE_PORT_ID_REGEX, col).group(1)
-                        if key:
-                            port_id_name_lookup[key] = file_data.name
+                        match = search_fe_port_id(col)
+                        if match and match.group(1):
+                            port_id_name_lookup[match.group(1)] = row[name_index]
 
             except IOError:
                 print('Could not open file {}'.format(file_name))
@@ -222,160 +206,65 @@ class HumanizeFcPort(Humanize):
         if not self.fc_port_lookup_dict:
             return 0
 
-        input_filename = get_full_path_for_file(self.PROCESSED_METRICS_OUTPUT_DIR, filename)
-
-        # Read data from fe fc port metrics file
+        # Add port name and index, read, write and IO size in KiB, read, write and total bandwidth in MiBPS and
+        # unaligned read, write and total bandwidth in MiBPS. Every record is written to the output file as soon as it
+        # is read from the fe fc port metrics file.
         try:
-            fe_fc_file_data = self.read_file_data(input_filename)
+            fe_fc_records = self.stream_file_data(filename, self.make_fe_fc_port_augmenter)
 
         except IOError:
             # Return if file could not be processed.
             print("Could not process file {}".format(filename))
             return 0
 
-        # Add port details such as port name and port index.
-        file_data_with_details = self.add_name_and_port_details(fe_fc_file_data, [COLUMN_HEADER_NAME,
-                                                                                  'FC_port'])
-
-        # Read size in KiB, write size in KiB and IO size in KiB is calculated for each record.
-        data_with_average_details = self.add_average_size_details(file_data_with_details)
-
-        # For each entry in metrics file total bandwidth, read bandwidth and write bandwidth is calculated in MiBPS.
-        data_with_bandwidth_details = self.add_bandwidth_details(data_with_average_details)
-
-        # For each entry in metrics file calculate unaligned read, write and total bandwidth in MiBPS.
-        data_with_unaligned_details = self.add_unaligned_details(data_with_bandwidth_details)
-
-        # Once the records are updated it is written back to metrics file.
-        fe_fc_records = self.write_to_file(filename, data_with_unaligned_details)
-
-        print('Records written in {} are {}'.format(filename, fe_fc_records))
-
         return fe_fc_records
 
-    def add_name_and_port_details(self, fe_fc_file_data, header_list):
-        """
-        Adds port name and index details for fe fc port metrics file using fe port id for lookup.
-
-        Args:
-            fe_fc_file_data (list): List of file data.
-            header_list (list): List of headers to append.
-
-        Returns:
-            A list of file data with name and port details.
-
-        Test:
-            test_humanize_base.py::test_add_name_and_port_details.
-        """""
-        file_data = namedtuple('FileData', fe_fc_file_data[0])
-
-        for record in fe_fc_file_data[1:]:
-            data = file_data(*record)
-
-            name = get_value_from_key(data.fe_port_id, self.fc_port_lookup_dict, COLUMN_HEADER_NAME)
-            record.append(name)
-
-            fc_port = get_value_from_key(data.fe_port_id, self.fc_port_lookup_dict, COLUMN_HEADER_INDEX)
-            record.append(fc_port)
-
-        fe_fc_file_data[0].extend(header_list)
-
-        return fe_fc_file_data
-
-    def add_average_size_details(self, fe_fc_file_data):
-        """
-        Adds user friendly sizes from bytes to kilobytes. Equates average read, write and average io size to Kilobytes.
-
-        Args:
-            fe_fc_file_data (list): List of records in metrics file.
-
-        Returns:
-            A list of file data with average size details calculated for each record.
-
-        Test:
-            test_humanize_base.py::test_add_average_size_details
-
-        """""
-        file_data = namedtuple('FileData', fe_fc_file_data[0])
-
-        for record in fe_fc_file_data[1:]:
-            data = file_data(*record)
-
-            read_size_kib = self.convert_to_kib(data.avg_read_size, 2)
-            record.append(read_size_kib)
-
-            write_size_kib = self.convert_to_kib(data.avg_write_size, 2)
-            record.append(write_size_kib)
-
-            io_size_kib = self.convert_to_kib(data.avg_io_size, 2)
-            record.append(io_size_kib)
-
-        fe_fc_file_data[0].extend(['avg_read_size_KiB', 'avg_write_size_KiB', 'average_io_size_KiB'])
-
-        return fe_fc_file_data
-
-    def add_bandwidth_details(self, fe_fc_file_data):
-        """
-        Adds bandwidth details from the fe fc metrics file. User friendly rates are added converting bytes per second
-        to megabytes per second. Read, write and total bandwidth is equated to user friendly values.
-
-        Args:
-            fe_fc_file_data (list): List of records in metrics file.
-
-        Returns:
-            A list of file data with bandwidth details.
-
-        Test:
-            test_humanize_base.py::test_add_bandwidth_details
-        """""
-        file_data = namedtuple('FileData', fe_fc_file_data[0])
-
-        for record in fe_fc_file_data[1:]:
-            data = file_data(*record)
-
-            read_bandwidth_mibps = self.convert_to_mib(data.read_bandwidth, 2)
-            record.append(read_bandwidth_mibps)
-
-            write_bandwidth_mibps = self.convert_to_mib(data.write_bandwidth, 2)
-            record.append(write_bandwidth_mibps)
-
-            total_bandwidth_mibps = self.convert_to_mib(data.total_bandwidth, 2)
-            record.append(total_bandwidth_mibps)
-
-        fe_fc_file_data[0].extend(['read_bandwidth_MiBPS', 'write_bandwidth_MiBPS', 'total_bandwidth_MiBPS'])
-
-        return fe_fc_file_data
-
-    def add_unaligned_details(self, fe_fc_file_data):
+    def make_fe_fc_port_augmenter(self, header):
         """
-        Adds unaligned details from the fe fc metrics file. User friendly rates are added converting bytes per second
-        to megabytes per second. Unaligned read, write and total bandwidth is equated to user friendly values.
+        Extends the header of the fe fc port metrics file with the port, KiB and MiBPS columns and returns a function
+        that appends their values to a record.
 
         Args:
-            fe_fc_file_data (list): List of records in metrics file.
+            header (list): Header row of the fe fc port metrics file.
 
         Returns:
-            A list of records with unaligned read, write and total bandwidth details.
-
-        Test:
-            test_humanize_base.py::test_add_unaligned_details
+            A function that appends the port, KiB and MiBPS details to a record.
         """""
-        file_data = namedtuple('FileData', fe_fc_file_data[0])
-
-        for record in fe_fc_file_data[1:]:
-            # Convert each record to namedtuple before processing.
-            data = file_data(*record)
-
-            unaligned_read_bandwidth_mibps = self.convert_to_mib(data.unaligned_read_bandwidth, 2)
-            record.append(unaligned_read_bandwidth_mibps)
-
-            unaligned_write_bandwidth_mibps = self.convert_to_mib(data.unaligned_write_bandwidth, 2)
-            record.append(unaligned_write_bandwidth_mibps)
+        # Resolve the column indices once for the whole file.
+        fe_port_id_index = header.index('fe_port_id')
+        size_indices = [header.index(column) for column in ('avg_read_size', 'avg_write_size', 'avg_io_size')]
+        bandwidth_indices = [header.index(column) for column in
+                             ('read_bandwidth', 'write_bandwidth', 'total_bandwidth', 'unaligned_read_bandwidth',
+                              'unaligned_write_bandwidth', 'unaligned_bandwidth')]
+
+        _gv = get_value_from_key
+        _kib = self.convert_to_kib
+        _mib = self.convert_to_mib
+        fc_port_lookup = self.fc_port_lookup_dict
+
+        header.extend([COLUMN_HEADER_NAME, 'FC_port',
+                       'avg_read_size_KiB', 'avg_write_size_KiB', 'average_io_size_KiB',
+                       'read_bandwidth_MiBPS', 'write_bandwidth_MiBPS', 'total_bandwidth_MiBPS',
+                       'unaligned_read_bandwidth_MiBPS', 'unaligned_write_bandwdith_MiBPS',
+                       'unaligned_bandwidth_MiBPS'])
+
+        def augment_record(record):
+            fe_port_id = record[fe_port_id_index]
+            values = [_gv(fe_port_id, fc_port_lookup, COLUMN_HEADER_NAME),
+                      _gv(fe_port_id, fc_port_lookup, COLUMN_HEADER_INDEX)]
+
+            # The sizes and bandwidths are converted inline, without a method call per value. If any value of the
+            # record cannot be converted, the record is converted again value by value so only that value is reported
+            # and set to 0.
+            try:
+                values.extend(['%.2f' % (float(record[index]) / BYTES_CONVERTER) for index in size_indices])
+                values.extend(['%.2f' % (float(record[index]) / BYTES_PER_MIB) for index in bandwidth_indices])
 
-            unaligned_bandwidth_mibps = self.convert_to_mib(data.unaligned_bandwidth, 2)
-            record.append(unaligned_bandwidth_mibps)
+            except (ValueError, TypeError):
+                del values[2:]
+                values.extend([_kib(record[index], 2) for index in size_indices])
+                values.extend([_mib(record[index], 2) for index in bandwidth_indices])
 
-        fe_fc_file_data[0].extend(['unaligned_read_bandwidth_MiBPS', 'unaligned_write_bandwdith_MiBPS',
-                                   'unaligned_bandwidth_MiBPS'])
+            record.extend(values)
 
-        return fe_fc_file_data
+        return augment_record
@@ -21,8 +21,7 @@ Configuration files are used to add user friendly object names.
 """""
 from __future__ import print_function
 
-from collections import namedtuple
-from humanize_base import Humanize, get_full_path_for_file, VIRTUAL_VOLUME_FILENAME
+from humanize_base import Humanize, BYTES_CONVERTER, BYTES_PER_MIB, VIRTUAL_VOLUME_FILENAME
 
 
 class HumanizeVolumes(Humanize):
@@ -47,6 +46,11 @@ class HumanizeVolumes(Humanize):
     # Index value to perform lookup in CSV file.
     VOLUME_ID = 'volume_id'
 
+    # Factors to convert bytes to KiB and MiB. These are exact powers of two, so multiplying gives the same result as
+    # dividing by 1024 and 1024 * 1024.
+    KIB_PER_BYTE = 1.0 / BYTES_CONVERTER
+    MIB_PER_BYTE = 1.0 / BYTES_PER_MIB
+
     lookup_dict = dict()
 
     def __init__(self, input_directory=None):
@@ -58,74 +62,54 @@ class HumanizeVolumes(Humanize):
         # Create a dictionary to assist lookup with volume id and volume name.
         self.lookup_dict = self.perform_lookup(volume_csv_files)
 
-    def calculate_kib(self, volume_file_data):
-        """
-        Calculates average IO size, average read, average write size in KiB for each entry present in the metric file.
-        The values are appended at the end of each record.
-
-        Args:
-            volume_file_data (list[]): Data from the volume metrics file for which calculations are performed.
-
-        Returns:
-             A list of entries with average IO, average read and average write in KiB appended at the end.
-        """""
-        volume = namedtuple('Volume', volume_file_data[0])
-
-        for data in volume_file_data[1:]:
-            volume_data = volume(*data)
-
-            # Calculates average IO size in KiB
-            io_size_in_kib = self.convert_to_kib(volume_data.avg_io_size, 1)
-            data.append(io_size_in_kib)
-
-            # Calculate average read size in KiB
-            read_size_in_kib = self.convert_to_kib(volume_data.avg_read_size, 1)
-            data.append(read_size_in_kib)
-
-            # Calculate average write size in KiB
-            write_size_in_kib = self.convert_to_kib(volume_data.avg_write_size, 1)
-            data.append(write_size_in_kib)
-
-        # Headers for IO size, read size and write size in KiB
-        volume_file_data[0].extend(
-            [self.COLUMN_HEADER_IO_SIZE_KIB, self.COLUMN_HEADER_READ_SIZE_KIB, self.COLUMN_HEADER_WRITE_SIZE_KIB])
-
-        return volume_file_data
-
-    def calculate_mib(self, volume_file_data):
+    def make_volume_augmenter(self, header):
         """
-        Calculates total bandwidth, read bandwidth and write bandwidth  in MiB for each record in metrics file system
-        and appends at the end of the record.
+        Extends the header of the volume metrics file with the volume name, KiB and MiB columns and returns a function
+        that appends their values to a record.
 
         Args:
-            volume_file_data (list[]): Records present in the volume metrics file.
+            header (list): Header row of the volume metrics file.
 
         Returns:
-            A list with total, read and write bandwidth in MiB appended in the end for each record.
+            A function that appends the volume name, KiB and MiB details to a record.
         """""
-
-        volume = namedtuple('Volume', volume_file_data[0])
-
-        for data in volume_file_data[1:]:
-            volume_data = volume(*data)
-
-            # Calculates total bandwidth in MiB
-            total_mib = self.convert_to_mib(volume_data.total_bandwidth, 3)
-            data.append(total_mib)
-
-            # Calculates read bandwidth in MiB
-            read_mib = self.convert_to_mib(volume_data.read_bandwidth, 3)
-            data.append(read_mib)
-
-            # Calculates write bandwidth in MiB
-            write_mib = self.convert_to_mib(volume_data.write_bandwidth, 3)
-            data.append(write_mib)
-
-        # Header for total bandwidth in MiB
-        volume_file_data[0].extend([self.COLUMN_HEADER_TOTAL_MIB, self.COLUMN_HEADER_READ_MIB,
-                                    self.COLUMN_HEADER_WRITE_MIB])
-
-        return volume_file_data
+        # Resolve the column indices once for the whole file.
+        volume_id_index = header.index(self.VOLUME_ID)
+        size_indices = [header.index(column) for column in ('avg_io_size', 'avg_read_size', 'avg_write_size')]
+        bandwidth_indices = [header.index(column) for column in
+                             ('total_bandwidth', 'read_bandwidth', 'write_bandwidth')]
+
+        header.extend([self.COLUMN_HEADER_VOLUME_NAME,
+                       self.COLUMN_HEADER_IO_SIZE_KIB, self.COLUMN_HEADER_READ_SIZE_KIB,
+                       self.COLUMN_HEADER_WRITE_SIZE_KIB,
+                       self.COLUMN_HEADER_TOTAL_MIB, self.COLUMN_HEADER_READ_MIB, self.COLUMN_HEADER_WRITE_MIB])
+
+        get_volume_name = self.lookup_dict.get
+        _kib = self.convert_to_kib
+        _mib = self.convert_to_mib
+        kib_per_byte = self.KIB_PER_BYTE
+        mib_per_byte = self.MIB_PER_BYTE
+
+        def augment_record(record):
+            # If the corresponding id does not have a name mapped to it, append id.
+            volume_id = record[volume_id_index]
+            values = [get_volume_name(volume_id, volume_id)]
+
+            # The sizes and bandwidths are converted inline, without a method call per value. If any value of the
+            # record cannot be converted, the record is converted again value by value so only that value is reported
+            # and set to 0.
+            try:
+                values.extend(['%.1f' % (float(record[index]) * kib_per_byte) for index in size_indices])
+                values.extend(['%.3f' % (float(record[index]) * mib_per_byte) for index in bandwidth_indices])
+
+            except (ValueError, TypeError):
+                del values[1:]
+                values.extend([_kib(record[index], 1) for index in size_indices])
+                values.extend([_mib(record[index], 3) for index in bandwidth_indices])
+
+            record.extend(values)
+
+        return augment_record
 
     def add_details(self, filename):
         """
@@ -152,30 +136,15 @@ class HumanizeVolumes(Humanize):
             print('No records available for volume lookup')
             return 0
 
-        input_file = get_full_path_for_file(self.PROCESSED_METRICS_OUTPUT_DIR, filename)
-
-        # A list of data from volume metrics file is created.
+        # A lookup for volume id and name is performed and name is added at the end of each record. IO size, read
+        # size and write size in KiB and total, read and write bandwidth in MiBPS are calculated and added for each
+        # record. Every record is written as soon as it is read from the volume metrics file.
         try:
-            file_data = self.read_file_data(input_file)
+            records_written = self.stream_file_data(filename, self.make_volume_augmenter)
 
         except IOError:
             # Return if file could not be processed.
             print("Could not process file {}".format(filename))
             return 0
 
-        # A lookup for volume id and name is performed and name is added at the end of each record.
-        volume_file_data_with_name = self.perform_lookup_with_id(file_data, self.lookup_dict,
-                                                                 self.COLUMN_HEADER_VOLUME_NAME, self.VOLUME_ID)
-
-        # IO size in KiB, read size in KiB and write size in KiB is calculated and added for each record in the file.
-        volume_file_data_with_kib = self.calculate_kib(volume_file_data_with_name)
-
-        # For each entry in volume metrics file total bandwidth,
-        # read bandwidth and write bandwidth is calculated in MiBPs
-        volume_file_data_with_mib = self.calculate_mib(volume_file_data_with_kib)
-
-        # Once the records are updated it is written back to metrics file.
-        records_written = self.write_to_file(filename, volume_file_data_with_mib)
-
-        print('Records written in {} are {}'.format(filename, records_written))
         return records_written
@@ -24,15 +24,20 @@ This program does not process files that do not have timestamps.
 from __future__ import print_function
 
 import argparse
+import bisect
 import collections
 import csv
 import json
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 from datetime import datetime, timedelta
 import operator
 import os
 import io
+import re
 import sys
 from io import open
+from itertools import islice
 
 STITCH_VERSION = '3.0.0.0'
 PY_VERSION_MAJOR = sys.version_info.major
@@ -56,6 +61,42 @@ FIVE_MINUTES_IN_SECS = 5 * ONE_MINUTE_IN_SECS
 ONE_HOUR_IN_SECS = 60 * ONE_MINUTE_IN_SECS
 ONE_DAY_IN_SECS = 24 * ONE_HOUR_IN_SECS
 
+# The sample interval of a table that is not in the catalog, by the ending of its table name.
+TABLE_NAME_ENDING_INTERVALS = (
+    ('_twenty_seconds', TWENTY_SECONDS),
+    ('_five_mins', FIVE_MINUTES_IN_SECS),
+    ('_one_hour', ONE_HOUR_IN_SECS),
+    ('_one_day', ONE_DAY_IN_SECS),
+)
+
+# Buffer size of the stitched output files. The rows are written one at a time, a large buffer keeps the number of
+# writes to the file system down.
+OUTPUT_BUFFER_SIZE = 1024 * 1024
+
+# Size of the blocks read from the end of a csv file to find its last row.
+TAIL_BLOCK_SIZE = 8192
+
+# Number of threads that check the csv files for timestamped data. The check only reads the first rows of a file, so
+# it mostly waits for the file system, which matters on network mounted collection directories.
+SCAN_THREADS = 16
+
+# Maximum number of worker processes that stitch tables in parallel. Every worker holds the text and rows of the
+# collection file it is rehydrating, so the peak memory use grows with the number of workers times the size of the
+# largest files. The cap keeps that bounded on hosts with many cores.
+MAX_STITCH_WORKERS = 4
+
+# Appended to a timestamp key, this sorts after every timestamp string with that key, whatever its microseconds or
+# timezone are.
+TIMESTAMP_KEY_END = '~'
+
+# The datetime values of the timestamp strings that have been converted. The cache is emptied when it reaches its
+# maximum size, so its memory use stays bounded for tables with many different timestamps.
+DATETIME_CACHE = dict()
+DATETIME_CACHE_MAX_SIZE = 65536
+
+# The canonical timestamp format, without timezone or microseconds: 2019-05-23 15:35:20
+TIMESTAMP_REGEX = re.compile(r'(\d{4})-(\d{2})-(\d{2}) (\d{2}):(\d{2}):(\d{2})$')
+
 
 def main(cmd_args):
     """ Main processing. This can be called with an array of arguments.
@@ -187,6 +228,9 @@ def stitch_tables(table_dict, output_directory_name):
         CSV objects together chronologically, and write the single table that spans the files from
         the collection directories to an output directory.
 
+        The tables are independent of each other, they are read from and written to different files,
+        so they are stitched in parallel by a pool of worker processes.
+
     Args:
         table_dict (dict): The dictionary with key of table name and value of list of CSV objects
                            for the table.
@@ -196,7 +240,39 @@ def stitch_tables(table_dict, output_directory_name):
     Test:
         rehydrate_test.py (implicit)
     """""
+    arguments = [(table_name, table_csv_obj_list, output_directory_name)
+                 for table_name, table_csv_obj_list in list(table_dict.items())]
+
     # Iterate over each table name and process the list of files for that table.
+    workers = min(len(arguments), multiprocessing.cpu_count(), MAX_STITCH_WORKERS)
+    if workers > 1:
+        pool = multiprocessing.Pool(processes=workers)
+        try:
+            tables_written = sum(pool.map(stitch_table, arguments))
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        tables_written = sum(stitch_table(argument) for argument in arguments)
+
+    return tables_written
+
+
+def stitch_table(arguments):
+    """ Stitch the CSV objects of one table together and write the table to the output directory. This
+        is a module level function so it can be run by a worker process of a multiprocessing pool.
+
+    Args:
+        arguments (tuple): The table name, the list of CSV objects for the table and the directory
+                           location of the results.
+
+    Returns:
+        The number of CSV objects stitched into the table.
+
+    Test:
+        rehydrate_test.py (implicit)
+    """""
+    table_name, table_csv_obj_list, output_directory_name = arguments
     tables_written = 0
 
     # Adjust open arguments for Python2 vs 3
@@ -207,71 +283,87 @@ def stitch_tables(table_dict, output_directory_name):
         open_mode = 'wb'
         kwargs = {}
 
-    for table_name, table_csv_obj_list in list(table_dict.items()):
-        # Create the output file and write the resulting table values.
-        filename_with_extension = table_name + '.csv'
+    # Create the output file and write the resulting table values.
+    filename_with_extension = table_name + '.csv'
 
-        output_file_path_name = os.path.join(output_directory_name, filename_with_extension)
+    output_file_path_name = os.path.join(output_directory_name, filename_with_extension)
 
-        # Create the csv file writer
-        try:
-            csv_output_file = io.open(output_file_path_name, open_mode, **kwargs)
-
-        except IOError as err:
-            raise ValueError('Unable create the file [{}].  Error: {}'.format(output_file_path_name, str(err)))
-
-        file_writer = csv.writer(csv_output_file, delimiter=',')
-
-        # Initialize the current end timestamp for each table that is processed
-        current_end_timestamp = None
-
-        # Stitch together all the tables in the list
-        is_first_table = True
-
-        for csv_obj in table_csv_obj_list:
-            last_row = None
+    # Create the csv file writer
+    try:
+        csv_output_file = io.open(output_file_path_name, open_mode, buffering=OUTPUT_BUFFER_SIZE, **kwargs)
 
-            # Read the header for this table object and find the column index of the timestamp value.
-            headers = csv_obj.get_column_headers()
-            if not headers:
-                raise IndexError('CSV object for file "{}" does not have any rows'.format(csv_obj.filename))
+    except IOError as err:
+        raise ValueError('Unable create the file [{}].  Error: {}'.format(output_file_path_name, str(err)))
 
-            timestamp_index = get_column_header_indices(headers, [COLUMN_HEADER_TIMESTAMP_LOWER])[0]
+    file_writer = csv.writer(csv_output_file, delimiter=',')
 
-            # Read the table into memory, sort it and insert the column header back into the sorted table
-            all_rows = csv_obj.read_all_rows()
-            sorted_table = sorted(all_rows[1:], key=operator.itemgetter(timestamp_index))
+    # Initialize the current end timestamp for each table that is processed
+    current_end_timestamp = None
 
-            # Only add the header back for the first table, the other tables
-            # will be stitched in and the header is no longer needed
-            if is_first_table:
-                is_first_table = False
+    # Stitch together all the tables in the list
+    is_first_table = True
 
-                # Identify and write the header.
-                csv_obj.locate_header_indices(all_rows[0])
-                file_writer.writerow(all_rows[0])
+    for csv_obj in table_csv_obj_list:
+        last_row = None
 
-            for row in sorted_table:
+        # Read the header for this table object and find the column index of the timestamp value.
+        headers = csv_obj.get_column_headers()
+        if not headers:
+            raise IndexError('CSV object for file "{}" does not have any rows'.format(csv_obj.filename))
+
+        timestamp_index = get_column_header_indices(headers, [COLUMN_HEADER_TIMESTAMP_LOWER])[0]
+
+        # Read the table into memory and sort its rows in place. The header row is set aside for the sort, so
+        # the rows are not copied into a second, sorted list.
+        sorted_table = csv_obj.read_all_rows()
+        header_row = sorted_table.pop(0)
+        sorted_table.sort(key=operator.itemgetter(timestamp_index))
+
+        # Only add the header back for the first table, the other tables
+        # will be stitched in and the header is no longer needed
+        if is_first_table:
+            is_first_table = False
+
+            # Identify and write the header.
+            csv_obj.locate_header_indices(header_row)
+            file_writer.writerow(header_row)
+
+        # The rows after the end timestamp of the preceding tables are written without comparing their timestamps,
+        # the first of them is found with a binary search of the sorted timestamps. The rows before it are still
+        # stitched with the end timestamp, rehydrating them may produce rows that are after it.
+        first_after_index = 0
+        if current_end_timestamp is not None:
+            timestamps = list(map(operator.itemgetter(timestamp_index), sorted_table))
+            first_after_index = bisect.bisect_right(timestamps, current_end_timestamp + TIMESTAMP_KEY_END)
+
+        # Most rows are neither deleted nor repeated, they are handled here without a call to stitch. A row before
+        # the first row after the end timestamp is then dropped, a row from there on is written as it is.
+        deleted_index = csv_obj._deleted_index
+        repeat_index = csv_obj._repeat_index
+        write_row = file_writer.writerow
+
+        for row in islice(sorted_table, first_after_index):
+            if (deleted_index is None or not row[deleted_index]) and (repeat_index is None or row[repeat_index] == '1'):
+                last_row = None
+            else:
                 last_row = csv_obj.stitch(row, current_end_timestamp, timestamp_index, file_writer)
 
-            try:
-                # Update the end timestamp based upon the last item written to the file.
-                if last_row:
-                    current_end_timestamp = \
-                        convert_string_time_to_datetime(last_row[timestamp_index])
-
-            except ValueError as e:
-                # Make sure to close the file writer if there is an exception.
-                csv_output_file.close()
+        for row in islice(sorted_table, first_after_index, None):
+            if (deleted_index is None or not row[deleted_index]) and (repeat_index is None or row[repeat_index] == '1'):
+                write_row(row)
+                last_row = row
+            else:
+                last_row = csv_obj.stitch(row, None, timestamp_index, file_writer)
 
-                # This should never happen because if CSV objects have data, they must have a timestamp
-                # column (this is validated when data is added to the CSV object.
-                raise ValueError('Could not get timestamp while stitching tables together:\n [{}]'.format(str(e)))
+        # Update the end timestamp based upon the last item written to the file. It is kept as a timestamp key
+        # string, so the rows of the next table are compared without parsing their timestamps.
+        if last_row:
+            current_end_timestamp = get_timestamp_key(last_row[timestamp_index])
 
-            tables_written += 1
+        tables_written += 1
 
-        # Close the file writer
-        csv_output_file.close()
+    # Close the file writer
+    csv_output_file.close()
 
     return tables_written
 
@@ -326,9 +418,20 @@ def get_timestamped_files_list(directory_name):
 
     # From the list of fully qualified filenames that are csv files, filter out files that do not
     # have timestamp entries and at least one data row.  The files without a timestamp column and at
-    # least one row of data cannot be stitched together, so ignore them.
-    only_timestamped_with_data_files = [full_file_name for full_file_name in csv_files_list
-                                        if table_has_timestamped_data(full_file_name)]
+    # least one row of data cannot be stitched together, so ignore them. The files are checked by a pool
+    # of threads, so the waits for opening and reading the files overlap.
+    if len(csv_files_list) > 1:
+        pool = ThreadPool(processes=min(len(csv_files_list), SCAN_THREADS))
+        try:
+            has_timestamped_data = pool.map(table_has_timestamped_data, csv_files_list)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        has_timestamped_data = [table_has_timestamped_data(full_file_name) for full_file_name in csv_files_list]
+
+    only_timestamped_with_data_files = [full_file_name for full_file_name, is_timestamped
+                                        in zip(csv_files_list, has_timestamped_data) if is_timestamped]
 
     # Make sure the filenames are in sorted order.
     return sorted(only_timestamped_with_data_files)
@@ -406,12 +509,15 @@ def build_table_name_to_csv_objs_dict(table_name_set, files_with_timestamps, cat
         # Create a list of CSV Objects associated with each filename
         # No files have been loaded into memory at this point.  Use CsvObj.read_all_rows() to do that.
         csv_obj_list = [CsvObj(filename, table_time_interval_secs) for filename in file_list]
-        for csv_obj in csv_obj_list:
-            all_rows = csv_obj.read_all_rows()
-            csv_obj.locate_header_indices(all_rows[0])
 
+        # Only the header and the first row of data are read to locate the header indices and to check for data, the
+        # rows of the file are read once, when the tables are stitched together.
         # Drop all CSV objects that don't have data, they contribute no data.
-        csv_list_with_data = [csv_obj for csv_obj in csv_obj_list if csv_obj.has_data()]
+        csv_list_with_data = []
+        for csv_obj in csv_obj_list:
+            header, first_row = csv_obj.read_first_two_rows()
+            if header and first_row:
+                csv_list_with_data.append(csv_obj)
 
         # The dictionary key (table name) has the value of the list of files to construct a unified
         # table.
@@ -440,12 +546,25 @@ def next_timestamp(current_timestamp_str, seconds_between_samples):
     # Convert the time as a string to a time as a datetime.
     timestamp_datetime = convert_string_time_to_datetime(current_timestamp_str)
 
+    # The time is advanced as seconds since the start of the day. The date is only converted to a string again when
+    # the time rolls over to a later day, the time of day is formatted from the seconds with integer arithmetic.
+    day_datetime = datetime(timestamp_datetime.year, timestamp_datetime.month, timestamp_datetime.day)
+    date_str = day_datetime.strftime('%Y-%m-%d')
+    seconds_of_day = timestamp_datetime.hour * ONE_HOUR_IN_SECS + timestamp_datetime.minute * ONE_MINUTE_IN_SECS + \
+        timestamp_datetime.second
+
     while True:
         # Advance the time
-        timestamp_datetime += timedelta(seconds=seconds_between_samples)
-
-        # Convert the time from datetime back to the string format that the caller wants.
-        current_timestamp_str = timestamp_datetime.strftime('%Y-%m-%d %H:%M:%S+00:00')
+        seconds_of_day += seconds_between_samples
+        if seconds_of_day >= ONE_DAY_IN_SECS:
+            days, seconds_of_day = divmod(seconds_of_day, ONE_DAY_IN_SECS)
+            day_datetime += timedelta(days=days)
+            date_str = day_datetime.strftime('%Y-%m-%d')
+
+        # Convert the time back to the string format that the caller wants.
+        hours, seconds_of_hour = divmod(seconds_of_day, ONE_HOUR_IN_SECS)
+        minutes, seconds = divmod(seconds_of_hour, ONE_MINUTE_IN_SECS)
+        current_timestamp_str = '%s %02d:%02d:%02d+00:00' % (date_str, hours, minutes, seconds)
         yield current_timestamp_str
 
 
@@ -476,6 +595,10 @@ class CsvObj(object):
         self._repeat_index = None
         self._deleted_index = None
 
+        # The first two rows and the last row of the file, once they have been read.
+        self._first_two_rows = None
+        self._last_row = None
+
     def read_all_rows(self):
         """
         Read the csv file from it's current position.
@@ -489,12 +612,24 @@ class CsvObj(object):
 
         if self.filename:
             try:
-                with io.open(self.filename, 'r', encoding='UTF-8') as file_handle:
-                    reader = csv.reader(file_handle, delimiter=',')
+                with open_for_sequential_read(self.filename) as file_handle:
+                    file_text = file_handle.read()
 
-                    # Read each line from the file into memory
-                    for row in reader:
-                        all_rows.append(row)
+                if '"' in file_text:
+                    # Quoted values can contain commas and line breaks, only the csv reader parses them correctly.
+                    # The list is filled by the C reader in one call.
+                    reader = csv.reader(io.StringIO(file_text), delimiter=',')
+                    all_rows = list(reader)
+
+                else:
+                    # Without quotes every line is a row and every comma separates two values, so the lines are
+                    # split directly, which is faster than the csv reader. Like the csv reader, an empty line is an
+                    # empty row and the line break at the end of the file does not start another row.
+                    lines = file_text.split('\n')
+                    if not lines[-1]:
+                        lines.pop()
+
+                    all_rows = [line.split(',') if line else [] for line in lines]
 
             except IOError as err:
                 raise ValueError('Unable to read from file [{}].  Error: {}'.format(self.filename, str(err)))
@@ -560,7 +695,7 @@ class CsvObj(object):
 
         Args:
             data_row ([str]): An array column data for this row
-            current_end_timestamp ():
+            current_end_timestamp (str): Timestamp key of the last row of the preceding tables, or None.
             timestamp_index (int): The column index in the row associated with the timestamp value.
             file_writer (): A csv file handle.
 
@@ -661,28 +796,34 @@ class CsvObj(object):
         Test:
             rehydrate_test.py (implicit)
         """""
-        # Write the row of data out to a file
-        last_row = data_row
-
-        later_generator = next_timestamp(data_row[self._timestamp_index], self._seconds_between_samples)
-
-        copied_row = data_row
-        for _ in range(repeat_count - 1):
-            # Get a copy of the data row.
-            new_row = copied_row
-
-            # Advance the timestamp for this new row using a generator.
-            new_row[self._timestamp_index] = next(later_generator)
-
-            # Test to see if the rehydrated timestamp value should be included
-            if current_end_timestamp is None or \
-               is_row_after_timestamp(data_row, current_end_timestamp, timestamp_index):
-                # This row needs to be included, write the hydrated row.
-                last_row = new_row
-                file_writer.writerow(new_row)
-
-        # Return the last row written in order to keep track of the last timestamp to stitch
-        return last_row
+        row_timestamp_index = self._timestamp_index
+        seconds_between_samples = self._seconds_between_samples
+
+        # The rehydrated rows up to the end timestamp are not written. Their number is computed from the time
+        # between the row and the end timestamp, and the timestamp of the row is advanced past them at once.
+        if current_end_timestamp is not None:
+            row_datetime = convert_string_time_to_datetime(data_row[row_timestamp_index])
+            seconds_to_end = (convert_string_time_to_datetime(current_end_timestamp) - row_datetime).total_seconds()
+            skipped_count = min(int(seconds_to_end // seconds_between_samples), repeat_count - 1) \
+                if seconds_to_end > 0 else 0
+
+            if skipped_count:
+                skipped_datetime = row_datetime + timedelta(seconds=skipped_count * seconds_between_samples)
+                data_row[row_timestamp_index] = skipped_datetime.strftime('%Y-%m-%d %H:%M:%S+00:00')
+                repeat_count -= skipped_count
+
+        # The rehydrated rows are written from the data row itself, only its timestamp is advanced for every
+        # row using a generator. All of them are after the end timestamp.
+        later_timestamps = islice(next_timestamp(data_row[row_timestamp_index], seconds_between_samples),
+                                  repeat_count - 1)
+
+        write_row = file_writer.writerow
+        for timestamp in later_timestamps:
+            data_row[row_timestamp_index] = timestamp
+            write_row(data_row)
+
+        # Return the last row in order to keep track of the last timestamp to stitch
+        return data_row
 
     def sort_table_with_timestamp(self, rows):
         """ Sort a table according to its timestamp index column.  The first row of the table is a
@@ -701,7 +842,8 @@ class CsvObj(object):
         return sorted_table
 
     def read_first_two_rows(self):
-        """ Read the beginning of the csv file and return the first two rows
+        """ Read the beginning of the csv file and return the first two rows. The header indices are located
+            from the column headers that are read.
 
         Exceptions:
             ValueError if the file could not be opened.
@@ -716,26 +858,32 @@ class CsvObj(object):
         if not self.filename:
             return header, first_row
 
+        # The rows are only read from the file the first time.
+        if self._first_two_rows is not None:
+            return self._first_two_rows
+
         try:
             with io.open(self.filename, 'r', encoding='UTF-8') as file_handle:
                 reader = csv.reader(file_handle)
                 try:
                     # Read the column header
                     header = next(reader)
+                    self.locate_header_indices(header)
 
                     # Try to read one line of data
                     first_row = next(reader)
 
-                    # A row of data exists to reach this code point.
-                    return header, first_row
-
                 except StopIteration:
                     # The file did not have a row of data. Swallow the exception and continue.
-                    return header, first_row
+                    pass
 
         except IOError:
             raise ValueError('Could not open file {}'.format(self.filename))
 
+        # A row of data exists if first_row is not empty.
+        self._first_two_rows = (header, first_row)
+        return self._first_two_rows
+
     def read_last_row(self):
         """
         Read the csv file and return the last row.  This is used to obtain the last seen timestamp.
@@ -747,15 +895,29 @@ class CsvObj(object):
         if not self.filename:
             return last_row
 
-        try:
-            with io.open(self.filename, 'r', encoding='UTF-8', errors='ignore') as file_handle:
-                all_rows = file_handle.readlines()
-                if all_rows:
-                    last_row = all_rows[-1]
+        # The row is only read from the file the first time.
+        if self._last_row is not None:
+            return self._last_row
 
-                    # last_row is an unicode line, convert it to a string, remove the '\n'
-                    # and then convert it to a list of strings
-                    last_row = last_row.encode('ascii', 'ignore').strip().split(',')
+        try:
+            with io.open(self.filename, 'rb') as file_handle:
+                # Only the end of the file is read. Blocks are read backwards from the end until the tail holds a
+                # line break before the one that ends the file, the last line follows that line break.
+                file_handle.seek(0, os.SEEK_END)
+                position = file_handle.tell()
+                tail = b''
+                while position > 0 and tail.rfind(b'\n', 0, len(tail) - 1) < 0:
+                    block_size = min(TAIL_BLOCK_SIZE, position)
+                    position -= block_size
+                    file_handle.seek(position)
+                    tail = file_handle.read(block_size) + tail
+
+                if tail:
+                    last_row = tail[tail.rfind(b'\n', 0, len(tail) - 1) + 1:]
+
+                    # last_row is a byte string line, decode it like the rest of the file is decoded, remove the '\n'
+                    # and then parse it into a list of strings, quoted values can contain commas.
+                    last_row = next(csv.reader([last_row.decode('UTF-8', 'ignore').strip()]))
 
         except IndexError as err:
             raise ValueError("Attempted to read the past the last row {}. Error: {}".format(last_row, str(err)))
@@ -763,6 +925,7 @@ class CsvObj(object):
         except IOError:
             raise ValueError('Could not open file {}'.format(self.filename))
 
+        self._last_row = last_row
         return last_row
 
     def has_data(self):
@@ -792,10 +955,13 @@ class CsvObj(object):
         Test:
             rehydrate_test.py::test_stitch_no_overlap
         """""
-        # It is not guaranteed that the added rows would be sorted, so sort them now.
-        sorted_table = self.sort_table_with_timestamp(rows_to_add)
+        # It is not guaranteed that the added rows would be sorted, so sort them now. The sort only takes linear time
+        # when they already are. The column header row is left out of the sort, so it is not put back and sliced off
+        # again.
+        sorted_table = rows_to_add[1:]
+        sorted_table.sort(key=operator.itemgetter(self._timestamp_index))
 
-        for row in sorted_table[1:]:
+        for row in sorted_table:
             self.stitch(row, None, self._timestamp_index, writer)
 
     def get_first_timestamp_as_dt(self):
@@ -839,36 +1005,59 @@ class CsvObj(object):
             for selecting the table data to be added to a previously processed table (which has
             an end timestamp).
 
+        Returns:
+            An iterator of the rows after the timestamp, the column header row is skipped.
+
         Test:
             rehydrate_test.py (implicit)
         """""
-        if timestamp_dt is None:
-            timestamp_dt = datetime.min
+        return get_rows_after_timestamp(rows, timestamp_dt, self._timestamp_index, first_row_index=1)
+
 
-        # This assumes that the rows are sorted by timestamp.
-        return [row for row in rows[1:]
-                if convert_string_time_to_datetime(row[self._timestamp_index]) > timestamp_dt]
+def open_for_sequential_read(filename):
+    """ Open a csv file that is read from start to end. Where the platform supports it, the kernel is told
+        that the file is read sequentially, so it reads ahead further.
 
+    Args:
+        filename (str): The file to open.
 
-def is_row_after_timestamp(row, timestamp_dt, timestamp_index):
+    Returns:
+        The file opened for reading text.
+
+    Raises IOError
+    """""
+    file_handle = io.open(filename, 'r', encoding='UTF-8')
+
+    # posix_fadvise is only available on Python 3 on Unix platforms, it is only a hint so failures are ignored.
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(file_handle.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+    return file_handle
+
+
+def is_row_after_timestamp(row, timestamp_key, timestamp_index):
     """ Given a row of data and an index for the timestamp column,
     determine if the row is after the provided timestamp.
 
     Args:
         row ([str]): A single row of data from the csv file
-        timestamp_dt (): A timestamp to compare against
+        timestamp_key (str): A timestamp key, as returned by get_timestamp_key, to compare against.
+                             None is before any row.
         timestamp_index (int): The index into the row data to the specified timestamp column.
 
     Returns:
         bool: True if the row is after the specified timestamp.
     """""
-    if timestamp_dt is None:
-        timestamp_dt = datetime.min
+    if timestamp_key is None:
+        return True
 
-    return convert_string_time_to_datetime(row[timestamp_index]) > timestamp_dt
+    return get_timestamp_key(row[timestamp_index]) > timestamp_key
 
 
-def get_rows_after_timestamp(rows, timestamp_dt, timestamp_index):
+def get_rows_after_timestamp(rows, timestamp_dt, timestamp_index, first_row_index=0):
     """ Get all of the rows in a table after the specified timestamp.  Needed for stitching,
         for selecting the table data to be added to a previously processed table (which has
         an end timestamp).
@@ -877,16 +1066,29 @@ def get_rows_after_timestamp(rows, timestamp_dt, timestamp_index):
         rows ([str]): A list of rows
         timestamp_dt:
         timestamp_index (int): An index where the timestamp value can be found in the list of rows
+        first_row_index (int): The index of the first row to consider, the rows before it are skipped.
+
+    Returns:
+        An iterator of the rows after the timestamp. The rows are produced as the caller iterates, so
+        the rows that are kept are not copied into a second list.
 
     Test:
         rehydrate_test.py (implicit)
     """""
+    # Without a timestamp every row is after it, so there is nothing to search for.
     if timestamp_dt is None:
-        timestamp_dt = datetime.min
+        return islice(rows, first_row_index, None)
+
+    # The timestamp is converted to a timestamp key once, the timestamps of the rows are compared as timestamp keys
+    # instead of being parsed. Like the timestamps of the rows, the key has no microseconds.
+    timestamp_key = timestamp_dt.replace(microsecond=0).isoformat(' ')
+
+    # This assumes that the rows are sorted by timestamp, so the first row after the timestamp is found with a
+    # binary search of the timestamps and all the rows from there on are after it.
+    timestamps = list(map(operator.itemgetter(timestamp_index), islice(rows, first_row_index, None)))
+    first_after_index = bisect.bisect_right(timestamps, timestamp_key + TIMESTAMP_KEY_END)
 
-    # This assumes that the rows are sorted by timestamp.
-    return [row for row in rows
-            if convert_string_time_to_datetime(row[timestamp_index]) > timestamp_dt]
+    return islice(rows, first_row_index + first_after_index, None)
 
 
 def table_has_timestamped_data(filename):
@@ -906,28 +1108,20 @@ def table_has_timestamped_data(filename):
     """""
     try:
         with open(filename, 'r', encoding='UTF-8') as file_handle:
-            reader = csv.reader(file_handle)
-            try:
-                column_header_row = next(reader)
-                timestamp_index, = get_column_header_indices(column_header_row, [COLUMN_HEADER_TIMESTAMP_LOWER])
-                if timestamp_index is None:
-                    return False
-
-            except StopIteration:
-                # The file was empty. Swallow the exception and continue.
+            # Only the header line is parsed, the rest of the file is not needed for the check.
+            header_line = file_handle.readline()
+            if not header_line:
+                # The file was empty.
                 return False
 
-            # Check for a row of data.
-            try:
-                next(reader)
-
-                # A row of data exists to reach this code point.
-                return True
-
-            except StopIteration:
-                # The file did not have a row of data. Swallow the exception and continue.
+            column_header_row = next(csv.reader([header_line]))
+            timestamp_index, = get_column_header_indices(column_header_row, [COLUMN_HEADER_TIMESTAMP_LOWER])
+            if timestamp_index is None:
                 return False
 
+            # Check for a row of data, it does not need to be parsed.
+            return bool(file_handle.readline())
+
     except IOError:
         raise ValueError('Could not open file {}'.format(filename))
 
@@ -951,10 +1145,33 @@ def get_column_header_indices(column_headers, columns):
     Test:
         rehydrate_test.py::test_get_column_header_indices
     """""
-    # Get the column header row in lower case so that comparisons don't fail because of case.
-    header_row_lower = [item.lower() for item in column_headers]
+    # Map the column headers in lower case, so that comparisons don't fail because of case, to their index. A column
+    # header that appears more than once keeps the index of its first appearance.
+    header_indices = dict()
+    for index, item in enumerate(column_headers):
+        header_indices.setdefault(item.lower(), index)
+
+    return tuple(header_indices.get(column) for column in columns)
 
-    return tuple(header_row_lower.index(column) if column in header_row_lower else None for column in columns)
+
+def get_timestamp_key(time_str):
+    """ Get the part of a timestamp string that is compared when tables are stitched together. The timestamps
+        have the fixed, zero padded format 2019-05-23 15:35:20, so comparing the strings orders them the same way
+        as comparing their datetime values, without parsing them.
+
+        The comparison is only valid for zero padded timestamps. A timestamp with an unpadded field, such as
+        2019-5-23 9:35:20, is cut correctly but does not sort by time as a string, and the tables would be stitched
+        in the wrong order.
+
+    Args:
+        time_str (str): The time represented as a string, can have timezone and microseconds.
+                        The format of the timestamp is: 2019-05-23 15:35:20.000000+00:00
+
+    Returns:
+        The timestamp string without any timezone or microseconds, the same part convert_string_time_to_datetime
+        parses.
+    """""
+    return time_str.split('+')[0].split('.')[0]
 
 
 def convert_string_time_to_datetime(time_str):
@@ -979,9 +1196,25 @@ def convert_string_time_to_datetime(time_str):
     Test:
         rehydrate_test.py::test_convert_string_time_to_datetime
     """""
-    timestamp_no_timezone_str = time_str.split('+')[0].split('.')[0]  # split and ignore any timezone or microseconds
+    # Timestamps repeat a lot, rows of different objects share them, so every string is only parsed once.
+    timestamp_datetime = DATETIME_CACHE.get(time_str)
+    if timestamp_datetime is None:
+        # Split and ignore any timezone or microseconds.
+        timestamp_no_timezone_str = time_str.split('+')[0].split('.')[0]
+
+        # The fields of a timestamp in the canonical format are converted directly, which is much faster than
+        # strptime. Other timestamps are left to strptime, which also raises the ValueError for a wrong format.
+        match = TIMESTAMP_REGEX.match(timestamp_no_timezone_str)
+        if match:
+            timestamp_datetime = datetime(*[int(field) for field in match.groups()])
+        else:
+            timestamp_datetime = datetime.strptime(timestamp_no_timezone_str, '%Y-%m-%d %H:%M:%S')
 
-    return datetime.strptime(timestamp_no_timezone_str, '%Y-%m-%d %H:%M:%S')
+        if len(DATETIME_CACHE) >= DATETIME_CACHE_MAX_SIZE:
+            DATETIME_CACHE.clear()
+        DATETIME_CACHE[time_str] = timestamp_datetime
+
+    return timestamp_datetime
 
 
 class Catalog(object):
@@ -1005,7 +1238,8 @@ class Catalog(object):
 
         # Read the JSON catalog into a dictionary.
         try:
-            self._catalog = json.loads(open(catalog_filename).read())
+            with open(catalog_filename, 'r', encoding='UTF-8') as file_handle:
+                self._catalog = json.load(file_handle)
 
         except IOError:
             # The flag for using the default value is already set.
@@ -1035,19 +1269,11 @@ class Catalog(object):
 
     @staticmethod
     def _get_interval_from_table_name(table_name):
-        filename_ending_to_interval_secs = {
-            "_twenty_seconds": TWENTY_SECONDS,
-            "_five_mins": FIVE_MINUTES_IN_SECS,
-            "_one_hour": ONE_HOUR_IN_SECS,
-            "_one_day": ONE_DAY_IN_SECS,
-        }
-
-        interval_seconds = next((interval_seconds for key, interval_seconds
-                                 in list(filename_ending_to_interval_secs.items())
-                                 if table_name.endswith(key)),
-                                TWENTY_SECONDS if not table_name.startswith('space') else FIVE_MINUTES_IN_SECS)
-
-        return interval_seconds
+        for table_name_ending, interval_seconds in TABLE_NAME_ENDING_INTERVALS:
+            if table_name.endswith(table_name_ending):
+                return interval_seconds
+
+        return TWENTY_SECONDS if not table_name.startswith('space') else FIVE_MINUTES_IN_SECS
 
 
 if __name__ == '__main__':